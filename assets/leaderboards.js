@@ -0,0 +1,106 @@
+// Season leaderboards computed in the browser from the snapshot the server
+// sends once (see leaderboard_snapshot in leaderboard.py). Used when the app
+// runs with CLIENTSIDE_LEADERBOARDS=1.
+(function () {
+    var ALL_TEAMS = "All Teams";
+    var decoded = new WeakMap();
+
+    // the snapshot as one array per column, categories decoded
+    function columns(snapshot) {
+        var cols = decoded.get(snapshot);
+        if (cols) {
+            return cols;
+        }
+        cols = {};
+        snapshot.columns.forEach(function (col) {
+            var values = snapshot.data[col];
+            if (values && values.categories) {
+                cols[col] = values.codes.map(function (code) {
+                    return code < 0 ? null : values.categories[code];
+                });
+            } else {
+                cols[col] = values;
+            }
+        });
+        decoded.set(snapshot, cols);
+        return cols;
+    }
+
+    // row positions of the leaderboard, the same order as metric_order in
+    // leaderboard.py: stable, missing values last
+    function leaderboardRows(snapshot, metric, season, team) {
+        var cols = columns(snapshot);
+        var values = cols[metric];
+        var rows = [];
+        for (var i = 0; i < values.length; i++) {
+            if (cols.Season[i] !== season) {
+                continue;
+            }
+            if (team !== ALL_TEAMS && cols.Team[i] !== team) {
+                continue;
+            }
+            if (snapshot.exclude_zeros[metric] && values[i] === 0) {
+                continue;
+            }
+            rows.push(i);
+        }
+        var sign = snapshot.ascending[metric] ? 1 : -1;
+        rows.sort(function (a, b) {
+            var x = values[a];
+            var y = values[b];
+            if (x === null || y === null) {
+                return (x === null) - (y === null);
+            }
+            return sign * (x - y);
+        });
+        return rows;
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        leaderboards: {
+            seasonGraph: function (metric, season, team, snapshot) {
+                if (!snapshot) {
+                    return window.dash_clientside.no_update;
+                }
+                var cols = columns(snapshot);
+                var rows = leaderboardRows(snapshot, metric, season, team);
+                // show the top 15 across all teams, the whole squad for a team
+                if (team === ALL_TEAMS) {
+                    rows = rows.slice(0, 15);
+                }
+                var layout = Object.assign({}, snapshot.layout, {
+                    title: {
+                        text: "Top " + team + " Players " + metric + " (" + season + ")",
+                    },
+                    xaxis: {title: {text: metric}},
+                });
+                return {
+                    data: [
+                        {
+                            type: "bar",
+                            orientation: "h",
+                            x: rows.map(function (i) { return cols[metric][i]; }),
+                            y: rows.map(function (i) { return cols.PLAYER[i]; }),
+                        },
+                    ],
+                    layout: layout,
+                };
+            },
+            seasonTable: function (metric, season, team, snapshot) {
+                if (!snapshot) {
+                    return window.dash_clientside.no_update;
+                }
+                var cols = columns(snapshot);
+                return leaderboardRows(snapshot, metric, season, team).map(
+                    function (i) {
+                        var record = {};
+                        snapshot.columns.forEach(function (col) {
+                            record[col] = cols[col][i];
+                        });
+                        return record;
+                    }
+                );
+            },
+        },
+    });
+})();
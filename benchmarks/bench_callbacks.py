@@ -0,0 +1,174 @@
+"""Benchmark every Dash callback of ipl-app.py over its whole input space.
+
+Usage, from anywhere in the repository:
+
+    python benchmarks/bench_callbacks.py --repeat 5 --output before.json
+    python benchmarks/bench_callbacks.py --repeat 5 --compare before.json
+
+The response cache is disabled unless --cached is given, so the numbers are
+the cost of computing the callbacks.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentiles(values):
+    values = np.asarray(values)
+    return {
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "p99": float(np.percentile(values, 99)),
+        "mean": float(values.mean()),
+        "max": float(values.max()),
+    }
+
+
+def bench_callback(app, callback_id, combinations, repeat):
+    """Latency, allocation and response size of one callback."""
+    from dash.exceptions import PreventUpdate
+    from input_space import call_callback
+
+    timings = []
+    sizes = []
+    skipped = 0
+    for args in combinations:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            try:
+                response = call_callback(app, callback_id, args)
+            except PreventUpdate:
+                skipped += 1
+                break
+            timings.append(time.perf_counter() - start)
+        else:
+            sizes.append(len(response))
+
+    # allocations in a separate pass, tracemalloc slows every call down
+    peaks = []
+    for args in combinations:
+        tracemalloc.start()
+        try:
+            call_callback(app, callback_id, args)
+        except PreventUpdate:
+            continue
+        finally:
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+    result = {"combinations": len(combinations), "calls": len(timings)}
+    if skipped:
+        result["prevented"] = skipped
+    if timings:
+        result["latency_ms"] = {
+            k: round(v * 1000, 3) for k, v in percentiles(timings).items()
+        }
+        result["peak_alloc_kb"] = {
+            k: round(v / 1024, 1) for k, v in percentiles(peaks).items()
+        }
+        result["response_bytes"] = {k: int(v) for k, v in percentiles(sizes).items()}
+    return result
+
+
+def run(repeat, samples, only=None):
+    from input_space import (
+        input_combinations,
+        layout_components,
+        load_app,
+        player_choices,
+    )
+
+    start = time.perf_counter()
+    module = load_app()
+    import_seconds = time.perf_counter() - start
+
+    app = module.app
+    components = layout_components(app)
+    choices = player_choices(module)
+    results = {}
+    for callback_id, callback in app.callback_map.items():
+        if only and not any(name in callback_id for name in only):
+            continue
+        # clientside callbacks run in the browser
+        if "callback" not in callback:
+            continue
+        combinations = input_combinations(
+            app, callback_id, components, samples, choices
+        )
+        results[callback_id] = bench_callback(app, callback_id, combinations, repeat)
+        latency = results[callback_id].get("latency_ms", {})
+        print(
+            "{:<75} n={:<5} p50={:>8} ms p95={:>8} ms p99={:>8} ms".format(
+                callback_id,
+                results[callback_id]["calls"],
+                latency.get("p50", "-"),
+                latency.get("p95", "-"),
+                latency.get("p99", "-"),
+            )
+        )
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "repeat": repeat,
+        "import_seconds": round(import_seconds, 3),
+        "callbacks": results,
+    }
+
+
+def compare(current, baseline):
+    """Print the p50/p95 latency and response size changes against a baseline."""
+    print()
+    print("{:<75} {:>10} {:>10} {:>10}".format("callback", "p50", "p95", "bytes"))
+    for callback_id, result in current["callbacks"].items():
+        old = baseline["callbacks"].get(callback_id)
+        if old is None or "latency_ms" not in old or "latency_ms" not in result:
+            continue
+        changes = []
+        for new_value, old_value in [
+            (result["latency_ms"]["p50"], old["latency_ms"]["p50"]),
+            (result["latency_ms"]["p95"], old["latency_ms"]["p95"]),
+            (result["response_bytes"]["mean"], old["response_bytes"]["mean"]),
+        ]:
+            change = 100 * (new_value - old_value) / old_value if old_value else 0
+            changes.append("{:+.1f}%".format(change))
+        print("{:<75} {:>10} {:>10} {:>10}".format(callback_id, *changes))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="calls per input")
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=5,
+        help="random player selections and season ranges",
+    )
+    parser.add_argument("--only", nargs="*", help="callback ids containing these")
+    parser.add_argument("--cached", action="store_true", help="keep the cache on")
+    parser.add_argument("--output", help="write the results to this json file")
+    parser.add_argument("--compare", help="results json file to compare against")
+    args = parser.parse_args()
+
+    # the app reads data/ and images/ relative to the working directory
+    os.chdir(repo_root)
+    sys.path.insert(0, repo_root)
+    if not args.cached:
+        os.environ["CALLBACK_CACHE_SIZE"] = "0"
+
+    results = run(args.repeat, args.samples, args.only)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print("results written to", args.output)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
@@ -0,0 +1,316 @@
+"""Load test ipl-app.py running under gunicorn on this machine.
+
+Boots the app for every workers x threads configuration, replays browser
+sessions against it (page load, the initial callbacks, then dropdown
+changes) from concurrent virtual users and reports throughput, latency
+and errors.
+
+    python benchmarks/load_test.py --configs 1x1 2x1 2x4 --users 8 --duration 30
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import requests
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# input_space lives at the top of the repo
+sys.path.insert(0, repo_root)
+from input_space import split_callback_id  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(port, workers, threads, preload=True):
+    """Start gunicorn the way the Procfile does and wait until it answers.
+
+    gunicorn.conf.py is read as in production, preload sets PRELOAD_APP for
+    it. gunicorn's log goes to a temporary file, printed if it fails.
+    """
+    command = [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "ipl-app:server",
+        "--bind",
+        "127.0.0.1:{}".format(port),
+        "--workers",
+        str(workers),
+        "--threads",
+        str(threads),
+    ]
+    env = dict(os.environ, PRELOAD_APP="1" if preload else "0")
+    # a file, not a pipe nobody reads, so error tracebacks never block gunicorn
+    log = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        command, cwd=repo_root, env=env, stdout=subprocess.DEVNULL, stderr=log
+    )
+    process.log = log
+    url = "http://127.0.0.1:{}/".format(port)
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn exited:\n" + read_log(process))
+        try:
+            if requests.get(url, timeout=5).status_code == 200:
+                return process
+        except requests.RequestException:
+            time.sleep(0.25)
+    stop_gunicorn(process)
+    raise RuntimeError(
+        "gunicorn did not start within 120 seconds:\n" + read_log(process)
+    )
+
+
+def read_log(process):
+    process.log.seek(0)
+    return process.log.read().decode(errors="replace")
+
+
+def stop_gunicorn(process):
+    process.terminate()
+    process.wait()
+    process.log.close()
+
+
+def layout_props(node, props=None):
+    """Map the id of every component in the layout json to its props."""
+    if props is None:
+        props = {}
+    if isinstance(node, list):
+        for child in node:
+            layout_props(child, props)
+    elif isinstance(node, dict) and "props" in node:
+        if "id" in node["props"]:
+            props[node["props"]["id"]] = node["props"]
+        layout_props(node["props"].get("children"), props)
+    return props
+
+
+class Session:
+    """One virtual user, keeps the component values like the browser does."""
+
+    def __init__(self, base_url, stats, rng):
+        self.base_url = base_url
+        self.stats = stats
+        self.rng = rng
+        self.http = requests.Session()
+
+    def request(self, kind, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.http.request(method, self.base_url + path, **kwargs)
+            ok = response.status_code in (200, 204)
+        except requests.RequestException:
+            response, ok = None, False
+        self.stats.record(kind, time.perf_counter() - start, ok)
+        return response
+
+    def load_page(self):
+        self.request("page", "GET", "/")
+        layout = self.request("layout", "GET", "/_dash-layout")
+        dependencies = self.request("dependencies", "GET", "/_dash-dependencies")
+        if layout is None or dependencies is None:
+            return False
+        self.props = layout_props(layout.json())
+        self.callbacks = [
+            cb for cb in dependencies.json() if cb.get("clientside_function") is None
+        ]
+        # every callback fires once when the page loads
+        for callback in self.callbacks:
+            self.fire(callback, [])
+        return True
+
+    def fire(self, callback, changed):
+        inputs = [
+            {
+                "id": dep["id"],
+                "property": dep["property"],
+                "value": self.props.get(dep["id"], {}).get(dep["property"]),
+            }
+            for dep in callback["inputs"]
+        ]
+        body = {
+            "output": callback["output"],
+            "outputs": split_callback_id(callback["output"]),
+            "inputs": inputs,
+            "state": [],
+            "changedPropIds": changed,
+        }
+        response = self.request(
+            callback["output"], "POST", "/_dash-update-component", json=body
+        )
+        if response is not None and response.status_code == 200:
+            # keep outputs like page_count, other callbacks read them
+            for component_id, values in response.json()["response"].items():
+                self.props.setdefault(component_id, {}).update(values)
+
+    def change_dropdown(self):
+        """Pick a single value dropdown, change it and fire its callbacks."""
+        dropdowns = [
+            component_id
+            for component_id, props in self.props.items()
+            if props.get("options") and not props.get("multi")
+        ]
+        component_id = self.rng.choice(dropdowns)
+        options = self.props[component_id]["options"]
+        self.props[component_id]["value"] = self.rng.choice(options)["value"]
+        prop_id = "{}.value".format(component_id)
+        for callback in self.callbacks:
+            if any(
+                "{}.{}".format(dep["id"], dep["property"]) == prop_id
+                for dep in callback["inputs"]
+            ):
+                self.fire(callback, [prop_id])
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, kind, seconds, ok):
+        with self.lock:
+            self.latencies.setdefault(kind, []).append(seconds)
+            if not ok:
+                self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def summary(self, elapsed):
+        total = sum(len(v) for v in self.latencies.values())
+        errors = sum(self.errors.values())
+        result = {
+            "requests": total,
+            "errors": errors,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "throughput_rps": round(total / elapsed, 1),
+            # no request finished, a short run or a server that never answered
+            "latency_ms": {},
+            "by_request": {},
+        }
+        if total:
+            everything = np.concatenate(
+                [np.asarray(v) for v in self.latencies.values()]
+            )
+            result["latency_ms"] = latency_summary(everything)
+        for kind, values in sorted(self.latencies.items()):
+            result["by_request"][kind] = {
+                "requests": len(values),
+                "errors": self.errors.get(kind, 0),
+                "latency_ms": latency_summary(np.asarray(values)),
+            }
+        return result
+
+
+def latency_summary(values):
+    return {
+        "p50": round(float(np.percentile(values, 50)) * 1000, 2),
+        "p95": round(float(np.percentile(values, 95)) * 1000, 2),
+        "p99": round(float(np.percentile(values, 99)) * 1000, 2),
+        "max": round(float(values.max()) * 1000, 2),
+    }
+
+
+def virtual_user(base_url, stats, seed, stop_at, interactions):
+    rng = random.Random(seed)
+    while time.time() < stop_at:
+        session = Session(base_url, stats, rng)
+        if not session.load_page():
+            continue
+        for _ in range(interactions):
+            if time.time() >= stop_at:
+                break
+            session.change_dropdown()
+
+
+def run_config(workers, threads, users, duration, interactions, preload=True):
+    port = free_port()
+    process = start_gunicorn(port, workers, threads, preload)
+    try:
+        base_url = "http://127.0.0.1:{}".format(port)
+        stats = Stats()
+        start = time.time()
+        stop_at = start + duration
+        user_threads = [
+            threading.Thread(
+                target=virtual_user,
+                args=(base_url, stats, seed, stop_at, interactions),
+            )
+            for seed in range(users)
+        ]
+        for thread in user_threads:
+            thread.start()
+        for thread in user_threads:
+            thread.join()
+        summary = stats.summary(time.time() - start)
+        if summary["error_rate"] > 0:
+            print(read_log(process)[-4000:], file=sys.stderr)
+        return summary
+    finally:
+        stop_gunicorn(process)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--configs",
+        nargs="+",
+        default=["1x1", "2x1", "2x4"],
+        help="gunicorn workers x threads to test",
+    )
+    parser.add_argument("--users", type=int, default=8, help="concurrent users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds each")
+    parser.add_argument(
+        "--interactions", type=int, default=20, help="dropdown changes per visit"
+    )
+    parser.add_argument(
+        "--preload",
+        choices=["on", "off"],
+        default="on",
+        help="sets PRELOAD_APP, read by gunicorn.conf.py",
+    )
+    parser.add_argument("--output", help="write the results to this json file")
+    args = parser.parse_args()
+
+    results = {}
+    for config in args.configs:
+        workers, threads = (int(n) for n in config.split("x"))
+        summary = run_config(
+            workers,
+            threads,
+            args.users,
+            args.duration,
+            args.interactions,
+            args.preload == "on",
+        )
+        results[config] = summary
+        print(
+            "{:>6}: {:>8} req/s  p50 {:>8} ms  p95 {:>8} ms  p99 {:>8} ms  "
+            "errors {:.2%}".format(
+                config,
+                summary["throughput_rps"],
+                summary["latency_ms"].get("p50", "-"),
+                summary["latency_ms"].get("p95", "-"),
+                summary["latency_ms"].get("p99", "-"),
+                summary["error_rate"],
+            )
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print("results written to", args.output)
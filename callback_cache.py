@@ -0,0 +1,111 @@
+import json
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+import dash
+import flask
+
+
+class CallbackCache:
+    """Bounded LRU cache of serialized callback responses.
+
+    Values are the JSON strings Dash sends back to the browser, so a hit
+    skips both the pandas work and the Plotly serialization. clear() starts
+    a new generation, responses computed before it are not stored.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.generation = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, generation=None):
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def triggered_props():
+    """Properties of the inputs that triggered the running callback.
+
+    Part of the cache key, as a response may leave outputs unchanged
+    depending on them, like a leaderboard graph when only its table is paged.
+    """
+    if not flask.has_request_context():
+        return []
+    return sorted(
+        set(t["prop_id"].rsplit(".", 1)[-1] for t in dash.callback_context.triggered)
+    )
+
+
+def cache_key(callback_id, args, outputs_list, triggered=()):
+    """Build a hashable key from the callback id and its input values."""
+    return (
+        callback_id,
+        json.dumps(args, sort_keys=True, default=str),
+        json.dumps(outputs_list, sort_keys=True, default=str),
+        tuple(triggered),
+    )
+
+
+def cache_callbacks(app, cache):
+    """Wrap every registered server-side callback of the app with the cache.
+
+    Call this once, after all the callbacks have been registered.
+    """
+    for callback_id, callback in app.callback_map.items():
+        if "callback" in callback:
+            callback["callback"] = _cached(callback_id, callback["callback"], cache)
+
+
+def _cached(callback_id, func, cache):
+    @wraps(func)
+    def wrapper(*args, outputs_list=None):
+        key = cache_key(callback_id, args, outputs_list, triggered_props())
+        generation = cache.generation
+        response = cache.get(key)
+        if response is None:
+            # PreventUpdate and other errors propagate and are not cached
+            response = func(*args, outputs_list=outputs_list)
+            cache.set(key, response, generation)
+        return response
+
+    return wrapper
@@ -0,0 +1,110 @@
+import logging
+import threading
+import time
+
+from data_store import file_path, source_signature
+
+logger = logging.getLogger(__name__)
+
+
+class DataWatcher:
+    """Poll the csv files in data/ and reload the app data when they change.
+
+    reload is called from the watcher thread with the names of the changed
+    files. A change is only picked up once the files stopped changing for a
+    whole poll interval, so half written csv files are never read.
+
+    Every worker runs a watcher. With data_store.reload_tables as reload, the
+    first worker to see a change rebuilds the store and the others wait for
+    it and load the new store.
+    """
+
+    def __init__(self, reload, file_path=file_path, interval=10.0):
+        self.reload = reload
+        self.file_path = file_path
+        self.interval = interval
+        self.reloads = 0
+        self.errors = 0
+        self.last_duration = 0.0
+        self.total_duration = 0.0
+        self.last_reload = 0.0
+        self._signature = self._read_signature()
+        self._pending = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _read_signature(self):
+        try:
+            return source_signature(self.file_path)
+        except OSError:
+            # a file is being replaced, try again on the next poll
+            return None
+
+    def start(self):
+        """Start polling, once per process.
+
+        Threads don't survive a fork, under gunicorn call this in the worker.
+        """
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="data-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.poll()
+
+    def changed_files(self, signature):
+        """The files changed since the last reload, once they are stable."""
+        if signature is None or signature == self._signature:
+            self._pending = None
+            return []
+        if signature != self._pending:
+            # changed since the last poll, wait for the writes to settle
+            self._pending = signature
+            return []
+        self._pending = None
+        return [
+            filename
+            for filename, stat in signature.items()
+            if self._signature is None or self._signature.get(filename) != stat
+        ]
+
+    def poll(self):
+        """Reload the data if the files changed, returns True if it did."""
+        signature = self._read_signature()
+        changed = self.changed_files(signature)
+        if not changed:
+            return False
+        start = time.perf_counter()
+        try:
+            self.reload(changed)
+        except Exception as e:
+            # keep serving the old data, retry when the files change again
+            logger.exception("data reload failed: %r", e)
+            with self._lock:
+                self.errors += 1
+            self._signature = signature
+            return False
+        duration = time.perf_counter() - start
+        with self._lock:
+            self.reloads += 1
+            self.last_duration = duration
+            self.total_duration += duration
+            self.last_reload = time.time()
+        self._signature = signature
+        logger.info("reloaded %s in %.2fs", ", ".join(changed), duration)
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                "reloads_total": self.reloads,
+                "errors_total": self.errors,
+                "last_duration_seconds": round(self.last_duration, 6),
+                "duration_seconds_total": round(self.total_duration, 6),
+                "last_reload_timestamp_seconds": round(self.last_reload, 3),
+            }
@@ -0,0 +1,336 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # windows, every process builds the store itself
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+from metric_registry import derive_metrics, leaderboard_views
+from schema import apply_schemas, memory_report
+from season_aggregates import SeasonAggregates
+
+logger = logging.getLogger(__name__)
+
+file_path = os.path.join(os.getcwd(), "data")
+store_path = os.path.join(file_path, "store")
+# season range cubes of the leaderboards, see season_form.cached_form
+cube_path = os.path.join(file_path, "cubes")
+# kde curves of the distribution plots, see kde.cached_densities
+kde_path = os.path.join(file_path, "kde")
+
+# csv files the cleaned tables are built from
+source_files = [
+    "points_table.csv",
+    "wins_losses.csv",
+    "batting.csv",
+    "batting_all_time.csv",
+    "bowling.csv",
+    "bowling_all_time.csv",
+]
+
+# csv files every cleaned table is built from
+table_sources = {
+    "points_table": ["points_table.csv"],
+    "wins_losses": ["wins_losses.csv"],
+    "batting": ["batting.csv"],
+    "batting_agg": ["batting_all_time.csv"],
+    "bowling": ["bowling.csv"],
+    "bowling_agg": ["bowling_all_time.csv", "bowling.csv"],
+}
+
+# how the bowling columns missing from bowling_all_time.csv are aggregated
+bowling_aggregates = {"Dots": "sum", "Maiden": "sum"}
+
+# bump when the cleaning steps change so old stores get rebuilt
+store_version = 4
+
+
+def load_data(filename, file_path=file_path):
+    csv_path = os.path.join(file_path, filename)
+    return pd.read_csv(csv_path)
+
+
+def clean_tables(file_path=file_path, typed=True, names=None):
+    """Read the csv files and apply the cleaning steps the app relies on.
+
+    Returns a dict of table name -> dataframe, cast to the schema dtypes
+    unless typed is False. Only the tables in names are built if given.
+    """
+    if names is None:
+        names = list(table_sources)
+    tables = {}
+
+    if "points_table" in names:
+        points_table = load_data("points_table.csv", file_path)
+        points_table["Net R/R"] = points_table["Net R/R"].round(3)
+        tables["points_table"] = points_table
+
+    if "wins_losses" in names:
+        wins_losses = load_data("wins_losses.csv", file_path)
+        wins_losses.sort_values(
+            by=["Titles", "Win %"], ascending=[False, False], inplace=True
+        )
+        wins_losses.drop("Span", axis=1, inplace=True)
+        tables["wins_losses"] = wins_losses
+
+    if "batting" in names:
+        # read batting data
+        batting = load_data("batting.csv", file_path)
+        batting.loc[batting["PLAYER"] == "Rohit Sharma", "Team"] = "Mumbai Indians"
+        tables["batting"] = batting
+
+    if "batting_agg" in names:
+        # batting aggregated data, the ratios again from the career sums as
+        # older csv files averaged the season ratios
+        batting_agg = load_data("batting_all_time.csv", file_path)
+        view = leaderboard_views["batting"]
+        batting_agg = derive_metrics(
+            batting_agg, view["metrics"], view["components"], replace=True
+        )
+        batting_agg = batting_agg.fillna({"Avg": 0, "SR": 0})
+        tables["batting_agg"] = batting_agg
+
+    if "bowling" in names or "bowling_agg" in names:
+        # read bowling data
+        bowling = load_data("bowling.csv", file_path)
+        bowling = bowling.rename(columns={"Maid": "Maiden"})
+        # create the derived metric columns
+        view = leaderboard_views["bowling"]
+        bowling = derive_metrics(bowling, view["metrics"], view["components"])
+        if "bowling" in names:
+            tables["bowling"] = bowling
+
+    if "bowling_agg" in names:
+        # read bowling aggregated data
+        bowling_agg = load_data("bowling_all_time.csv", file_path)
+        # the data that is not avialable in aggregated csv, summed per season
+        # so only new or changed seasons are aggregated again
+        bowling_totals = bowling_season_totals(bowling, file_path)
+        bowling_agg = pd.merge(
+            left=bowling_agg, right=bowling_totals, left_on="PLAYER", right_on="PLAYER"
+        )
+        # delete un-necessary column
+        bowling_agg.drop("Player Link", axis=1, inplace=True)
+        # the published career ratios are kept, Runs/Inns is added
+        view = leaderboard_views["bowling"]
+        bowling_agg = derive_metrics(bowling_agg, view["metrics"], view["components"])
+        tables["bowling_agg"] = bowling_agg
+
+    if typed:
+        tables = apply_schemas(tables)
+    return tables
+
+
+def bowling_season_totals(bowling, file_path=file_path):
+    """All time Dots and Maiden per player, kept in data/aggregates/bowling."""
+    aggregates_path = os.path.join(file_path, "aggregates", "bowling")
+    aggregates = SeasonAggregates.load(aggregates_path, bowling_aggregates)
+    if aggregates.update(bowling):
+        try:
+            aggregates.save(aggregates_path)
+        except OSError:
+            # read only data directory, aggregate again on the next start
+            pass
+    return aggregates.totals().reset_index()
+
+
+def affected_tables(changed_files):
+    """Names of the cleaned tables built from any of the changed csv files."""
+    return [
+        name
+        for name, filenames in table_sources.items()
+        if set(filenames) & set(changed_files)
+    ]
+
+
+def source_signature(file_path=file_path):
+    """Modification time and size of every source csv file."""
+    signature = {}
+    for filename in source_files:
+        stat = os.stat(os.path.join(file_path, filename))
+        signature[filename] = [int(stat.st_mtime_ns), stat.st_size]
+    return signature
+
+
+def save_column(series, path):
+    """Save one column as .npy files and return its manifest entry."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # integer codes plus the categories, missing values have code -1
+        np.save(path + ".npy", series.cat.codes.to_numpy())
+        np.save(path + ".categories.npy", series.cat.categories.to_numpy(dtype=str))
+        return {"kind": "category"}
+    if series.dtype == object:
+        # fixed width unicode arrays can be memory mapped, objects can't
+        nulls = series.isna().to_numpy()
+        np.save(path + ".npy", series.fillna("").to_numpy(dtype=str))
+        if nulls.any():
+            np.save(path + ".null.npy", nulls)
+        return {"kind": "str", "nulls": bool(nulls.any())}
+    np.save(path + ".npy", series.to_numpy())
+    return {"kind": "num"}
+
+
+def save_store(tables, store_path=store_path, file_path=file_path):
+    """Write every table as one .npy file per column plus a manifest.
+
+    The store is written to a temporary directory and renamed into place,
+    so readers never see a half written store.
+    """
+    parent = os.path.dirname(store_path)
+    tmp_path = tempfile.mkdtemp(prefix=".store-", dir=parent)
+    manifest = {
+        "version": store_version,
+        "sources": source_signature(file_path),
+        "tables": {},
+    }
+    for name, df in tables.items():
+        os.makedirs(os.path.join(tmp_path, name))
+        columns = []
+        for i, col in enumerate(df.columns):
+            entry = save_column(df[col], os.path.join(tmp_path, name, str(i)))
+            entry["name"] = col
+            columns.append(entry)
+        manifest["tables"][name] = {"columns": columns, "rows": len(df)}
+    with open(os.path.join(tmp_path, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    # swap the new store in place of the old one
+    old_path = None
+    try:
+        if os.path.exists(store_path):
+            old_path = tempfile.mkdtemp(prefix=".store-old-", dir=parent)
+            os.rename(store_path, os.path.join(old_path, "store"))
+        os.rename(tmp_path, store_path)
+    except OSError:
+        # another process swapped its store in first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    finally:
+        if old_path is not None:
+            shutil.rmtree(old_path, ignore_errors=True)
+
+
+def read_manifest(store_path=store_path):
+    try:
+        with open(os.path.join(store_path, "manifest.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def store_is_fresh(store_path=store_path, file_path=file_path):
+    """True when the store exists and was built from the current csv files."""
+    manifest = read_manifest(store_path)
+    return (
+        manifest is not None
+        and manifest.get("version") == store_version
+        and manifest.get("sources") == source_signature(file_path)
+    )
+
+
+def load_column(entry, path, mmap_mode):
+    values = np.load(path + ".npy", mmap_mode=mmap_mode)
+    if entry["kind"] == "category":
+        categories = np.load(path + ".categories.npy").astype(object)
+        return pd.Categorical.from_codes(values, categories)
+    if entry["kind"] == "str":
+        values = values.astype(object)
+        if entry["nulls"]:
+            values[np.load(path + ".null.npy")] = np.nan
+    return values
+
+
+def load_store(store_path=store_path, mmap_mode="r"):
+    """Map the stored tables back into dataframes.
+
+    The frames are built without copying, so their numeric columns stay
+    read-only views of the mapped files and every process that loads the
+    store shares the same pages of memory.
+    """
+    manifest = read_manifest(store_path)
+    tables = {}
+    for name, table in manifest["tables"].items():
+        data = {}
+        for i, entry in enumerate(table["columns"]):
+            path = os.path.join(store_path, name, str(i))
+            data[entry["name"]] = load_column(entry, path, mmap_mode)
+        columns = [entry["name"] for entry in table["columns"]]
+        tables[name] = pd.DataFrame(data, columns=columns, copy=False)
+    return tables
+
+
+@contextmanager
+def store_lock(store_path=store_path):
+    """Hold an exclusive lock on store_path.lock, so one process at a time
+    builds the store and the others wait and load it.
+
+    Without a writable lock file every process builds the store itself.
+    """
+    try:
+        lock_file = open(store_path + ".lock", "a")
+    except OSError:
+        yield
+        return
+    with lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        # closing the file releases the lock
+        yield
+
+
+def build_store(build, store_path=store_path, file_path=file_path):
+    """Load the store if it is fresh, else store and load the tables build()
+    returns. One process builds, the others wait for it and load its store.
+
+    Falls back to the built tables when the store can't be written.
+    """
+    if store_is_fresh(store_path, file_path):
+        return load_store(store_path)
+    with store_lock(store_path):
+        # built by another process while this one waited for the lock
+        if store_is_fresh(store_path, file_path):
+            return load_store(store_path)
+        tables = build()
+        try:
+            save_store(tables, store_path, file_path)
+        except OSError as e:
+            logger.warning("could not write the data store: %s", e)
+            return tables
+    # map the new store in, so this process shares it as well
+    return load_store(store_path)
+
+
+def load_tables(file_path=file_path, store_path=store_path):
+    """Load the cleaned tables from the binary store, building it if stale."""
+    return build_store(lambda: clean_tables(file_path), store_path, file_path)
+
+
+def reload_tables(tables, names, file_path=file_path, store_path=store_path):
+    """Rebuild the cleaned tables in names, keep the others and store them all.
+
+    When another process already stored the current csv files, its store is
+    loaded instead.
+    """
+    return build_store(
+        lambda: {**tables, **clean_tables(file_path, names=names)},
+        store_path,
+        file_path,
+    )
+
+
+if __name__ == "__main__":
+    # build step: python data_store.py
+    raw_tables = clean_tables(typed=False)
+    tables = apply_schemas(raw_tables)
+    print(memory_report(raw_tables, tables))
+    save_store(tables)
+    print("data store written to", store_path)
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+from leaderboard import ALL_TEAMS
+
+
+def nice_width(span, nbins, integer=False):
+    """A bin width of 1, 2 or 5 times a power of 10 giving about nbins bins."""
+    if span <= 0:
+        return 1.0
+    raw = span / nbins
+    power = 10 ** np.floor(np.log10(raw))
+    width = next(step * power for step in (1, 2, 5, 10) if step * power >= raw)
+    # integers never share a bin narrower than 1
+    return float(max(width, 1) if integer else width)
+
+
+def quantile(values, cumcounts, q):
+    """Quantile q of the data where values[i] occurs up to cumcounts[i] times.
+
+    Interpolated like plotly's box plots, the value at rank q * n - 0.5.
+    """
+    n = cumcounts[-1]
+    position = min(max(q * n - 0.5, 0), n - 1)
+    low = np.floor(position)
+    # the value at 0 based rank k is the first whose cumulative count exceeds k
+    ranks = np.searchsorted(cumcounts, [low, min(low + 1, n - 1)], "right")
+    lower, upper = values[ranks]
+    return lower + (position - low) * (upper - lower)
+
+
+class ValueCounts:
+    """How often every value of a column occurs, per season and team.
+
+    The counts are a season x team x distinct value array, so a histogram or
+    box summary of any seasons and teams is a sum over it and never touches
+    the rows. Figures built from them carry a fixed number of bins, or five
+    numbers and the outlying values per team, however many rows there are.
+    """
+
+    def __init__(self, df, column, nbins=50, season_col="Season", team_col="Team"):
+        values = df[column].to_numpy(dtype="float64")
+        keep = np.isfinite(values)
+        self.values, value_codes = np.unique(values[keep], return_inverse=True)
+        self.seasons, season_codes = np.unique(
+            df[season_col].to_numpy()[keep], return_inverse=True
+        )
+        # teams in order of appearance, the order px gives the box plots
+        team_codes, self.teams = pd.factorize(
+            np.asarray(df[team_col], dtype=object)[keep]
+        )
+        self.counts = np.zeros(
+            (len(self.seasons), len(self.teams), len(self.values)), dtype=np.int64
+        )
+        np.add.at(self.counts, (season_codes, team_codes, value_codes), 1)
+
+        # bins over all the rows, every filtered histogram shares them
+        integer = bool(np.all(self.values == np.round(self.values)))
+        lo, hi = (self.values[0], self.values[-1]) if len(self.values) else (0, 0)
+        self.width = nice_width(hi - lo, nbins, integer)
+        start = np.floor(lo / self.width) * self.width
+        if integer:
+            # keep the integers off the bin edges
+            start -= 0.5
+        self._bins = ((self.values - start) // self.width).astype(np.intp)
+        nbins = self._bins[-1] + 1 if len(self._bins) else 0
+        self.edges = start + self.width * np.arange(nbins + 1)
+
+    def team_counts(self, first, last):
+        """Counts of every team and value over the seasons first to last."""
+        seasons = (self.seasons >= first) & (self.seasons <= last)
+        return self.counts[seasons].sum(axis=0)
+
+    def histogram(self, first, last, team=ALL_TEAMS):
+        """Rows per bin of edges over the seasons first to last."""
+        counts = self.team_counts(first, last)
+        if team != ALL_TEAMS:
+            counts = counts[self.teams == team]
+        return np.bincount(
+            self._bins, weights=counts.sum(axis=0), minlength=len(self.edges) - 1
+        ).astype(np.int64)
+
+    def box_stats(self, first, last, teams=None):
+        """Quartiles, fences and outlying values per team, teams with no rows
+        over the seasons first to last are left out."""
+        counts = self.team_counts(first, last)
+        stats = []
+        for i, team in enumerate(self.teams):
+            if (teams is not None and team not in teams) or not counts[i].any():
+                continue
+            present = counts[i] > 0
+            values = self.values[present]
+            cumcounts = np.cumsum(counts[i][present])
+            q1, median, q3 = [quantile(values, cumcounts, q) for q in (0.25, 0.5, 0.75)]
+            # the fences are the furthest values within 1.5 IQR of the box
+            inside = (values >= q1 - 1.5 * (q3 - q1)) & (values <= q3 + 1.5 * (q3 - q1))
+            stats.append(
+                {
+                    "Team": team,
+                    "q1": q1,
+                    "median": median,
+                    "q3": q3,
+                    "lowerfence": min(q1, values[inside].min()),
+                    "upperfence": max(q3, values[inside].max()),
+                    "outliers": values[~inside],
+                }
+            )
+        columns = ["Team", "q1", "median", "q3", "lowerfence", "upperfence", "outliers"]
+        return pd.DataFrame(stats, columns=columns)
@@ -0,0 +1,13 @@
+import gc
+import os
+
+# import ipl-app.py once in the master process. The forked workers share its
+# data, indexes and figures copy-on-write instead of loading them each, and
+# start as soon as they are forked. Set PRELOAD_APP=0 to turn it off.
+preload_app = os.environ.get("PRELOAD_APP", "1") != "0"
+
+
+def when_ready(server):
+    # move the preloaded objects out of the garbage collector's reach, so
+    # collections in the workers don't write to, and copy, their pages
+    gc.freeze()
@@ -0,0 +1,120 @@
+import importlib.util
+import itertools
+import os
+import random
+
+app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ipl-app.py")
+
+
+def load_app(path=app_path):
+    """Import ipl-app.py, whose name isn't a valid module name, and return it."""
+    spec = importlib.util.spec_from_file_location("ipl_app", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def layout_components(app):
+    """Map the id of every component in the layout to the component."""
+    components = {}
+    # the layout can be a function returning it
+    for component in app._layout_value()._traverse():
+        component_id = getattr(component, "id", None)
+        if component_id is not None:
+            components[component_id] = component
+    return components
+
+
+def split_callback_id(callback_id):
+    """Return the outputs_list Dash sends for a callback id."""
+    if callback_id.startswith(".."):
+        outputs = []
+        for output in callback_id[2:-2].split("..."):
+            component_id, prop = output.rsplit(".", 1)
+            outputs.append({"id": component_id, "property": prop})
+        return outputs
+    component_id, prop = callback_id.rsplit(".", 1)
+    return {"id": component_id, "property": prop}
+
+
+def slider_positions(component):
+    """The values a slider can take, its marks or else every step."""
+    marks = getattr(component, "marks", None)
+    if marks:
+        return sorted(marks)
+    step = getattr(component, "step", None) or 1
+    count = int(round((component.max - component.min) / step))
+    return [component.min + i * step for i in range(count + 1)]
+
+
+def input_values(component, prop, samples=5, seed=0, choices=None):
+    """Candidate values of one callback input, taken from the layout.
+
+    Single dropdowns give every option and sliders every position. Multi
+    dropdowns and range sliders can't be enumerated, they give the layout
+    default plus a few random selections, of choices when the options come
+    from a search callback. Other properties give their layout value.
+    """
+    value = getattr(component, prop, None)
+    rng = random.Random(seed)
+    if prop != "value":
+        return [value]
+    if type(component).__name__ == "Slider":
+        positions = slider_positions(component)
+        return positions if value in positions else [value] + positions
+    if type(component).__name__ == "RangeSlider":
+        positions = slider_positions(component)
+        ranges = [value]
+        for _ in range(samples):
+            selection = sorted(rng.choices(positions, k=2))
+            if selection not in ranges:
+                ranges.append(selection)
+        return ranges
+    options = getattr(component, "options", None)
+    if choices is None and not options:
+        return [value]
+    option_values = choices or [option["value"] for option in options]
+    if not getattr(component, "multi", False):
+        return option_values
+    selections = [value]
+    for _ in range(samples):
+        selections.append(
+            rng.sample(option_values, rng.randint(1, min(8, len(option_values))))
+        )
+    return selections
+
+
+def player_choices(module):
+    """Every player of the player dropdowns, whose options come from a search
+    callback. The layout only holds the default selection."""
+    return {
+        "select-player-ts": module.app_data["batting_player_search"].players,
+        "select-player-wkts-ts": module.app_data["bowling_player_search"].players,
+    }
+
+
+def input_combinations(app, callback_id, components=None, samples=5, choices=None):
+    """Every combination of the candidate input values of a callback.
+
+    choices maps a component id to every value its options can hold.
+    """
+    if components is None:
+        components = layout_components(app)
+    choices = choices or {}
+    value_lists = [
+        input_values(
+            components[dep["id"]],
+            dep["property"],
+            samples,
+            choices=choices.get(dep["id"]),
+        )
+        for dep in app.callback_map[callback_id]["inputs"]
+    ]
+    return [list(args) for args in itertools.product(*value_lists)]
+
+
+def call_callback(app, callback_id, args):
+    """Run a server side callback and return its JSON response."""
+    callback = app.callback_map[callback_id]["callback"]
+    with app.server.test_request_context():
+        return callback(*args, outputs_list=split_callback_id(callback_id))
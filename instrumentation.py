@@ -0,0 +1,196 @@
+import threading
+import time
+from functools import wraps
+
+from dash.exceptions import PreventUpdate
+
+# histogram buckets, seconds for timings and bytes for payloads
+time_buckets = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5]
+size_buckets = [512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608]
+
+
+class Histogram:
+    """Cumulative histogram in the Prometheus sense, one series per label."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, label, value):
+        series = self._series.get(label)
+        if series is None:
+            series = self._series[label] = {
+                "counts": [0] * len(self.buckets),
+                "sum": 0.0,
+                "count": 0,
+            }
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series["counts"][i] += 1
+        series["sum"] += value
+        series["count"] += 1
+
+    def exposition(self):
+        lines = [
+            "# HELP {} {}".format(self.name, self.help_text),
+            "# TYPE {} histogram".format(self.name),
+        ]
+        for label, series in sorted(self._series.items()):
+            label = escape_label(label)
+            for bound, count in zip(self.buckets, series["counts"]):
+                lines.append(
+                    '{}_bucket{{callback="{}",le="{}"}} {}'.format(
+                        self.name, label, bound, count
+                    )
+                )
+            lines.append(
+                '{}_bucket{{callback="{}",le="+Inf"}} {}'.format(
+                    self.name, label, series["count"]
+                )
+            )
+            lines.append(
+                '{}_sum{{callback="{}"}} {}'.format(self.name, label, series["sum"])
+            )
+            lines.append(
+                '{}_count{{callback="{}"}} {}'.format(self.name, label, series["count"])
+            )
+        return lines
+
+
+def escape_label(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class CallbackMetrics:
+    """Latency and payload histograms for the Dash callbacks of one worker.
+
+    Every gunicorn worker keeps its own numbers, /metrics reports the worker
+    that answered the scrape.
+    """
+
+    def __init__(self):
+        self.duration = Histogram(
+            "dash_callback_duration_seconds",
+            "Wall time of a callback request, cache lookups included.",
+            time_buckets,
+        )
+        self.compute = Histogram(
+            "dash_callback_compute_seconds",
+            "Time spent in the callback function building figures and tables.",
+            time_buckets,
+        )
+        self.serialize = Histogram(
+            "dash_callback_serialize_seconds",
+            "Time spent turning the callback output into the JSON response.",
+            time_buckets,
+        )
+        self.response_bytes = Histogram(
+            "dash_callback_response_bytes",
+            "Size of the JSON response of a callback.",
+            size_buckets,
+        )
+        self.errors = {}
+        self.gauges = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def timed(self, func):
+        """Wrap a callback function to record the time spent computing it."""
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._local.compute = time.perf_counter() - start
+
+        return wrapper
+
+    def observe(self, callback_id, duration, compute, size):
+        with self._lock:
+            self.duration.observe(callback_id, duration)
+            self.response_bytes.observe(callback_id, size)
+            # cache hits never reach the callback function
+            if compute is not None:
+                self.compute.observe(callback_id, compute)
+                self.serialize.observe(callback_id, max(duration - compute, 0.0))
+
+    def add_gauges(self, name, help_text, values):
+        """Report the numbers returned by values() as gauges on every scrape."""
+        self.gauges.append((name, help_text, values))
+
+    def exposition(self):
+        """All the metrics in the Prometheus text format."""
+        with self._lock:
+            lines = []
+            for histogram in [
+                self.duration,
+                self.compute,
+                self.serialize,
+                self.response_bytes,
+            ]:
+                lines.extend(histogram.exposition())
+            lines.append(
+                "# HELP dash_callback_errors_total Callback requests that raised."
+            )
+            lines.append("# TYPE dash_callback_errors_total counter")
+            for callback_id, count in sorted(self.errors.items()):
+                lines.append(
+                    'dash_callback_errors_total{{callback="{}"}} {}'.format(
+                        escape_label(callback_id), count
+                    )
+                )
+        for name, help_text, values in self.gauges:
+            for key, value in sorted(values().items()):
+                metric = "{}_{}".format(name, key)
+                lines.append("# HELP {} {}".format(metric, help_text))
+                lines.append("# TYPE {} gauge".format(metric))
+                lines.append("{} {}".format(metric, value))
+        return "\n".join(lines) + "\n"
+
+
+def time_callback_functions(app, metrics):
+    """Make app.callback time the function of every callback registered later."""
+    register = app.callback
+
+    @wraps(register)
+    def callback(*args, **kwargs):
+        wrap_func = register(*args, **kwargs)
+        return lambda func: wrap_func(metrics.timed(func))
+
+    app.callback = callback
+
+
+def instrument_callbacks(app, metrics):
+    """Record wall time and response size of every registered callback.
+
+    Call this once, after all the callbacks have been registered and cached.
+    """
+    for callback_id, callback in app.callback_map.items():
+        if "callback" in callback:
+            callback["callback"] = _instrumented(
+                callback_id, callback["callback"], metrics
+            )
+
+
+def _instrumented(callback_id, func, metrics):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        metrics._local.compute = None
+        start = time.perf_counter()
+        try:
+            response = func(*args, **kwargs)
+        except PreventUpdate:
+            raise
+        except Exception:
+            with metrics._lock:
+                metrics.errors[callback_id] = metrics.errors.get(callback_id, 0) + 1
+            raise
+        duration = time.perf_counter() - start
+        metrics.observe(callback_id, duration, metrics._local.compute, len(response))
+        return response
+
+    return wrapper
@@ -16,90 +16,75 @@ import dash
 import dash_core_components as dcc
 import dash_bootstrap_components as dbc
 import dash_html_components as html
-from dash.dependencies import Input, Output
+from dash.dependencies import ClientsideFunction, Input, Output, State
 import dash_table
 import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
 import numpy as np
 import os
-import base64
-
-# function for loading data
-file_path = os.path.join(os.getcwd(), "data")
-
-
-def load_data(filename, file_path=file_path):
-    csv_path = os.path.join(file_path, filename)
-    return pd.read_csv(csv_path)
-
-
-# read the data
-points_table = load_data("points_table.csv")
-points_table["Net R/R"] = points_table["Net R/R"].round(3)
-
-wins_losses = load_data("wins_losses.csv")
-wins_losses.sort_values(by=["Titles", "Win %"], ascending=[False, False], inplace=True)
-wins_losses.drop("Span", axis=1, inplace=True)
-
-# read batting data
-batting = load_data("batting.csv")
-batting.iloc[batting[batting["PLAYER"] == "Rohit Sharma"].index, 16] = "Mumbai Indians"
-batting_players_list = list(batting["PLAYER"].unique())
+import copy
+import logging
+import flask
+from callback_cache import CallbackCache, cache_callbacks
+from instrumentation import (
+    CallbackMetrics,
+    instrument_callbacks,
+    time_callback_functions,
+)
+from data_store import affected_tables, cube_path, kde_path, load_tables, reload_tables
+from data_reload import DataWatcher
+from distributions import ValueCounts
+from kde import cached_densities
+from static_images import image_url, send_image
+from player_index import build_player_index
+from player_search import PlayerSearch, career_totals
+from leaderboard import (
+    build_leaderboard_index,
+    leaderboard_rows,
+    leaderboard_snapshot,
+)
+from metric_registry import leaderboard_views, metric_names
+from season_form import cached_form
+from table_paging import page_records
+from serialization import records, serialize_callbacks
+from static_export import forget_exported, serve_exported
 
-# batting aggregated data
-batting_agg = load_data("batting_all_time.csv")
 
+# horizontal bar chart shared by all the leaderboards
+def leaderboard_figure(df, rows, metric, team, title):
+    # show the top 15 across all teams, the whole squad for a single team
+    if team == "All Teams":
+        rows = rows[:15]
+    df = df.iloc[rows]
+    fig = go.Figure()
+    fig.add_trace(
+        go.Bar(
+            x=df[metric],
+            y=df["PLAYER"],
+            orientation="h",
+        )
+    )
+    fig.update_layout(
+        title=title,
+        xaxis=dict(title="{}".format(metric)),
+        yaxis=dict(autorange="reversed"),
+        height=550,
+    )
+    return fig
 
-# read bowling data
-bowling = load_data("bowling.csv")
-bowling = bowling.rename(columns={"Maid": "Maiden"})
-bowling_players_list = list(bowling["PLAYER"].unique())
-# create a new column
-bowling["Runs/Inns"] = (bowling["Runs"] / bowling["Inns"]).round(2)
 
-# read bowling aggregated data
-bowling_agg = load_data("bowling_all_time.csv")
-# copy the data that is not avialable in aggregated csv
-bowling_subset = bowling[["PLAYER", "Dots", "Maiden"]].copy()
-# calculate aggregates and join
-bs_groupby = bowling_subset.groupby("PLAYER").sum().reset_index()
-bowling_agg = pd.merge(
-    left=bowling_agg, right=bs_groupby, left_on="PLAYER", right_on="PLAYER"
-)
-# delete un-necessary column
-bowling_agg.drop("Player Link", axis=1, inplace=True)
-# create a new column
-bowling_agg["Runs/Inns"] = (bowling_agg["Runs"] / bowling_agg["Inns"]).round(2)
-
-
-batting_metrics_list = [
-    "Runs",
-    "HS",
-    "Avg",
-    "BF",
-    "SR",
-    "100",
-    "50",
-    "4s",
-    "6s",
-    "Mat",
-    "Inns",
-    "NO",
-]
+# floats of the stats tables are shown to two decimals
+table_decimals = 2
 
-bowling_metrics_list = [
-    "Wkts",
-    "Econ",
-    "Avg",
-    "SR",
-    "Runs/Inns",
-    "Dots",
-    "4w",
-    "5w",
-    "Maiden",
-    "Ov",
-]
+# sort and filter the season leaderboards in the browser instead
+clientside_leaderboards = os.environ.get("CLIENTSIDE_LEADERBOARDS", "0") == "1"
+if clientside_leaderboards:
+    season_table_actions = dict(
+        sort_action="native", filter_action="native", page_action="native"
+    )
+else:
+    season_table_actions = dict(
+        sort_action="custom", filter_action="custom", page_action="custom"
+    )
 
 team_list = [
     "All Teams",
@@ -123,73 +108,295 @@ heading_markdown = """
 # year list
 year_list = [year for year in range(2019, 2007, -1)]
 
-# players runs distribution plot
-runs_dist_plot = px.histogram(batting, x="Runs")
-runs_dist_plot.update_layout(title="Distribution of Player Runs(2008-2019)")
+# short names and colors of the teams in the kde plot
+team_labels = {
+    "Sunrisers Hyderabad": "SRH",
+    "Kings Xi Punjab": "KXIP",
+    "Mumbai Indians": "MI",
+    "Delhi Capitals": "DC",
+    "Kolkata Knight Riders": "KKR",
+    "Royal Challengers Bangalore": "RCB",
+    "Chennai Super Kings": "CSK",
+    "Rajasthan Royals": "RR",
+}
+team_colors = {
+    "Sunrisers Hyderabad": "Orange",
+    "Kings Xi Punjab": "Silver",
+    "Mumbai Indians": "Blue",
+    "Delhi Capitals": "Black",
+    "Kolkata Knight Riders": "Gold",
+    "Royal Challengers Bangalore": "Red",
+    "Chennai Super Kings": "Yellow",
+    "Rajasthan Royals": "Green",
+}
+
+# players shown in the time series charts before any search
+default_batters = ["Virat Kohli", "Rohit Sharma", "David Warner", "KL Rahul"]
+default_bowlers = [
+    "Jasprit Bumrah",
+    "Rashid Khan",
+    "Kagiso Rabada",
+    "Sunil Narine",
+    "Deepak Chahar",
+]
 
-# players runs kde plot
-import plotly.figure_factory as ff
 
-unique_teams = batting["Team"].unique()
+def player_options(players):
+    return [{"label": player, "value": player} for player in players]
 
-hist_data = [
-    batting[batting["Team"] == team]["Runs"] for team in unique_teams if team != "Nan"
-]
-group_labels = ["SRH", "KXIP", "MI", "DC", "KKR", "RCB", "CSK", "RR"]
-colors = ["Orange", "Silver", "Blue", "Black", "Gold", "Red", "Yellow", "Green"]
 
-runs_kde_plot = ff.create_distplot(
-    hist_data, group_labels, show_hist=False, show_rug=False, colors=colors
-)
-runs_kde_plot.update_layout(
-    title="Kde Plot of Runs", xaxis=dict(title="Runs"), yaxis=dict(title="Density")
-)
+# seasons first to last of the season range leaderboards
+def season_range_slider(component_id, first=min(year_list), last=max(year_list)):
+    return dcc.RangeSlider(
+        id=component_id,
+        min=min(year_list),
+        max=max(year_list),
+        step=1,
+        marks={year: str(year) for year in year_list},
+        value=[first, last],
+        allowCross=False,
+    )
 
 
-# function for adding local images
-def encode_image(image_file):
-    encoded = base64.b64encode(open(image_file, "rb").read())
-    return "data:image/png;base64,{}".format(encoded.decode())
+# filters of a distribution plot, the counts behind it are filtered on the server
+def distribution_controls(prefix, teams=True):
+    controls = []
+    if teams:
+        controls += [
+            html.Label("Select Team"),
+            dcc.Dropdown(
+                id=prefix + "-team",
+                options=[{"label": team, "value": team} for team in team_list],
+                value="All Teams",
+            ),
+        ]
+    return controls + [
+        html.Label("Seasons"),
+        season_range_slider(prefix + "-season-range"),
+    ]
+
+
+# form leaderboards of a view, over a window of recent seasons
+def form_section(view):
+    suffix = leaderboard_views[view]["suffix"]
+    return html.Div(
+        [
+            html.Div([], style={"height": "45px"}),
+            html.H4("Form"),
+            html.P("Totals and ratios over a range of seasons, the last 3 by default."),
+            html.Div([], style={"height": "20px"}),
+            dcc.Tabs(
+                [
+                    dcc.Tab(
+                        label="Chart",
+                        children=[
+                            html.P(""),
+                            html.Div(
+                                [
+                                    html.Div(
+                                        [
+                                            html.Label("Select a Metric"),
+                                            dcc.Dropdown(
+                                                id="form-metric-selector" + suffix,
+                                                options=[
+                                                    {"label": metric, "value": metric}
+                                                    for metric in metric_names(view)
+                                                ],
+                                                value=metric_names(view)[0],
+                                            ),
+                                        ],
+                                        style={
+                                            "width": "35%",
+                                            "display": "inline-block",
+                                        },
+                                    ),
+                                    html.Div(
+                                        [
+                                            html.Label("Select Team"),
+                                            dcc.Dropdown(
+                                                id="form-team-selector" + suffix,
+                                                options=[
+                                                    {"label": team, "value": team}
+                                                    for team in team_list
+                                                ],
+                                                value="All Teams",
+                                            ),
+                                        ],
+                                        style={
+                                            "width": "35%",
+                                            "float": "right",
+                                            "display": "inline-block",
+                                        },
+                                    ),
+                                ]
+                            ),
+                            html.Div([], style={"height": "20px"}),
+                            html.Label("Seasons"),
+                            season_range_slider(
+                                "form-season-range" + suffix, max(year_list) - 2
+                            ),
+                            html.Div([dcc.Graph(id="form-graph" + suffix)]),
+                        ],
+                    ),
+                    dcc.Tab(
+                        label="Table",
+                        children=[
+                            dash_table.DataTable(
+                                id="form-records" + suffix,
+                                # rows are paged, sorted and filtered on the server
+                                sort_action="custom",
+                                sort_by=[],
+                                filter_action="custom",
+                                filter_query="",
+                                style_cell={"textAlign": "left"},
+                                style_data_conditional=[
+                                    {
+                                        "if": {"row_index": "odd"},
+                                        "backgroundColor": "rgb(248, 248, 248)",
+                                    },
+                                ],
+                                style_table={"overflowX": "auto"},
+                                style_cell_conditional=[
+                                    {
+                                        "if": {"column_id": "PLAYER"},
+                                        "textAlign": "center",
+                                    },
+                                ],
+                                page_current=0,
+                                page_size=15,
+                                page_action="custom",
+                            )
+                        ],
+                    ),
+                ]
+            ),
+        ],
+        style={"width": "75%"},
+    )
 
 
-# Batting Feature Importances figures
+# Batting Feature Importances figures, served from the /images route
 
-batting_bar = os.getcwd() + "/images/batting_bar.png"
-batting_beeswarm = os.getcwd() + "/images/batting_beeswarm.png"
-batting_bf = os.getcwd() + "/images/batting_bf.png"
-batting_sr = os.getcwd() + "/images/batting_sr.png"
+batting_bar = image_url("batting_bar.png")
+batting_beeswarm = image_url("batting_beeswarm.png")
+batting_bf = image_url("batting_bf.png")
+batting_sr = image_url("batting_sr.png")
 
 # Bowling Feature Importances figures
-bowling_bar = os.getcwd() + "/images/bowling_bar.png"
-bowling_beeswarm = os.getcwd() + "/images/bowling_beeswarm.png"
-bowling_sr = os.getcwd() + "/images/bowling_sr.png"
-bowling_dots = os.getcwd() + "/images/bowling_dots.png"
+bowling_bar = image_url("bowling_bar.png")
+bowling_beeswarm = image_url("bowling_beeswarm.png")
+bowling_sr = image_url("bowling_sr.png")
+bowling_dots = image_url("bowling_dots.png")
+
+
+def build_data(tables, previous=None, changed=None):
+    """Every frame, index and figure the callbacks and the layout read.
+
+    On a reload, previous is the data being replaced and changed the names
+    of the rebuilt tables. Whatever was derived from the other tables is
+    reused, previous itself is left as it is.
+    """
+    data = dict(previous or {}, **tables)
+    data["tables"] = tables
+
+    def stale(*names):
+        return previous is None or any(name in changed for name in names)
+
+    batting = tables["batting"]
+    batting_agg = tables["batting_agg"]
+    bowling = tables["bowling"]
+    bowling_agg = tables["bowling_agg"]
+
+    if stale("batting"):
+        # seasons and runs of every player for the time series chart
+        data["batting_player_index"] = build_player_index(batting, ["Season", "Runs"])
+        # columns shown in the season records table
+        data["batting_table_columns"] = [
+            col for col in batting.columns if col != "Player Link"
+        ]
+
+        # runs per season and team, the runs distribution and kde plots are
+        # built from it
+        data["runs_counts"] = ValueCounts(batting, "Runs")
+
+    if stale("batting", "batting_agg"):
+        # player dropdown search, best run scorers first
+        batting_players = list(batting["PLAYER"].unique())
+        data["batting_player_search"] = PlayerSearch(
+            batting_players, career_totals(batting_players, batting_agg, "Runs")
+        )
 
+    if stale("bowling"):
+        # seasons and wickets of every player for the time series chart
+        data["bowling_player_index"] = build_player_index(bowling, ["Season", "Wkts"])
+        # columns shown in the season records table
+        data["bowling_table_columns"] = [
+            col for col in bowling.columns if col != "Player Link"
+        ]
+
+        # wickets per season and team, for the wickets histogram and box plot
+        data["wickets_counts"] = ValueCounts(bowling, "Wkts")
+
+    if stale("bowling", "bowling_agg"):
+        bowling_players = list(bowling["PLAYER"].unique())
+        data["bowling_player_search"] = PlayerSearch(
+            bowling_players, career_totals(bowling_players, bowling_agg, "Wkts")
+        )
 
-###### Bowling plots
+    # the leaderboards of every view in the metric registry
+    for view, spec in leaderboard_views.items():
+        season_df = tables[spec["season"]]
+        if stale(spec["season"]):
+            # sorted leaderboard positions for every (season, team, metric)
+            data[view + "_season_index"] = build_leaderboard_index(
+                season_df, spec["metrics"]
+            )
+            # running sums over the seasons for the season range leaderboards
+            data[view + "_form"] = cached_form(
+                season_df,
+                spec["metrics"],
+                spec["components"],
+                os.path.join(cube_path, view),
+                spec["counts"],
+            )
 
-# wickets histogram
-wickets_histogram = px.histogram(bowling, x="Wkts")
-wickets_histogram.update_layout(
-    title="Number of Wickets In A Season(2008-2019)",
-    yaxis=dict(title="Player Count"),
-    xaxis=dict(title="Number Of Wickets"),
-)
+        # sent once with the layout, assets/leaderboards.js does the rest
+        if clientside_leaderboards and stale(spec["season"]):
+            snapshot = leaderboard_snapshot(
+                season_df, data[view + "_table_columns"], spec["metrics"]
+            )
+            # the figure layout the browser fills the bars and titles into
+            snapshot["layout"] = leaderboard_figure(
+                season_df, [], spec["metrics"][0].name, "All Teams", ""
+            ).to_plotly_json()["layout"]
+            data[view + "_snapshot"] = snapshot
+    return data
+
+
+# show the data reload and static export messages
+logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+
+# read the cleaned data, from the binary store when it is up to date
+app_data = build_data(load_tables())
 
-# wickets taken by teams distribution
-team_wickets_dist = px.box(bowling[bowling["Team"] != "Nan"], x="Wkts", y="Team")
-team_wickets_dist.update_layout(
-    title="Wickets Taken Per Season (2008-2019)",
-    yaxis=dict(title="Players Team"),
-    xaxis=dict(title="Total Wickets"),
-)
 
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.SOLAR])
 
 server = app.server
 
+# latency and payload metrics of every callback, served at /metrics
+callback_metrics = CallbackMetrics()
+time_callback_functions(app, callback_metrics)
+
 
-app.layout = html.Div(
+# feature importance images with browser cache headers
+@server.route("/images/<path:filename>")
+def serve_image(filename):
+    return send_image(filename)
+
+
+# the layout without the data, see layout_props
+layout = html.Div(
     [
         html.H1("IPL Stats (2008-2019)"),
         html.H4("by Bhola Prasad"),
@@ -222,10 +429,6 @@ app.layout = html.Div(
                         # points table data
                         dash_table.DataTable(
                             id="points-table",
-                            columns=[
-                                {"name": i, "id": i} for i in points_table.columns
-                            ],
-                            data=points_table.to_dict("records"),
                             sort_action="native",
                             style_cell={"textAlign": "left"},
                             style_data_conditional=[
@@ -260,8 +463,6 @@ app.layout = html.Div(
             [
                 dash_table.DataTable(
                     id="wins-losses-table",
-                    columns=[{"name": i, "id": i} for i in wins_losses.columns],
-                    data=wins_losses.to_dict("records"),
                     sort_action="native",
                     style_cell={"textAlign": "left"},
                     style_data_conditional=[
@@ -300,16 +501,9 @@ app.layout = html.Div(
                 html.P("Use dropdown to select multiple players or remove them."),
                 dcc.Dropdown(
                     id="select-player-ts",
-                    options=[
-                        {"label": player, "value": player}
-                        for player in batting_players_list
-                    ],
-                    value=[
-                        "Virat Kohli",
-                        "Rohit Sharma",
-                        "David Warner",
-                        "KL Rahul",
-                    ],
+                    # only the selected players, the rest are searched for
+                    options=player_options(default_batters),
+                    value=default_batters,
                     multi=True,
                 ),
                 # Players Runs Time-Series Chart
@@ -343,11 +537,12 @@ app.layout = html.Div(
                     },
                 ),
                 html.Div(
-                    [dcc.Graph(id="runs-dist-plot", figure=runs_dist_plot)],
+                    distribution_controls("runs-dist")
+                    + [dcc.Graph(id="runs-dist-plot")],
                     style={"width": "60%", "float": "right", "display": "inline-block"},
                 ),
             ],
-            style={"margin": "40px", "height": 500},
+            style={"margin": "40px", "height": 650},
         ),
         # Kernal density estimation of Runs distributions
         html.Div(
@@ -372,16 +567,23 @@ app.layout = html.Div(
                     },
                 ),
                 html.Div(
-                    [
-                        dcc.Graph(
-                            id="runs-kde-plot",
-                            figure=runs_kde_plot,
-                        )
+                    distribution_controls("runs-kde", teams=False)
+                    + [
+                        html.Label("Bandwidth, times Scott's rule"),
+                        dcc.Slider(
+                            id="runs-kde-bandwidth",
+                            min=0.25,
+                            max=2,
+                            step=0.25,
+                            marks={bw: str(bw) for bw in [0.25, 0.5, 1, 1.5, 2]},
+                            value=1,
+                        ),
+                        dcc.Graph(id="runs-kde-plot"),
                     ],
                     style={"width": "60%", "float": "right", "display": "inline-block"},
                 ),
             ],
-            style={"margin": "40px", "height": 500},
+            style={"margin": "40px", "height": 700},
         ),
         # Batting Leaderboard - All Time
         html.H3("Batting Leaderboard"),
@@ -408,7 +610,9 @@ app.layout = html.Div(
                                                             "label": metric,
                                                             "value": metric,
                                                         }
-                                                        for metric in batting_metrics_list
+                                                        for metric in metric_names(
+                                                            "batting"
+                                                        )
                                                     ],
                                                     value="Runs",
                                                 ),
@@ -441,6 +645,9 @@ app.layout = html.Div(
                                         ),
                                     ]
                                 ),
+                                html.Div([], style={"height": "20px"}),
+                                html.Label("Seasons"),
+                                season_range_slider("all-time-season-range"),
                                 html.Div([dcc.Graph(id="all-time-graph")]),
                             ],
                         ),
@@ -449,12 +656,11 @@ app.layout = html.Div(
                             children=[
                                 dash_table.DataTable(
                                     id="all-time-records",
-                                    columns=[
-                                        {"name": i, "id": i}
-                                        for i in batting_agg.columns
-                                    ],
-                                    data=batting_agg.to_dict("records"),
-                                    sort_action="native",
+                                    # rows are paged, sorted and filtered on the server
+                                    sort_action="custom",
+                                    sort_by=[],
+                                    filter_action="custom",
+                                    filter_query="",
                                     style_cell={"textAlign": "left"},
                                     style_data_conditional=[
                                         {
@@ -471,7 +677,7 @@ app.layout = html.Div(
                                     ],
                                     page_current=0,
                                     page_size=15,
-                                    page_action="native",
+                                    page_action="custom",
                                 )
                             ],
                         ),
@@ -504,7 +710,9 @@ app.layout = html.Div(
                                                             "label": metric,
                                                             "value": metric,
                                                         }
-                                                        for metric in batting_metrics_list
+                                                        for metric in metric_names(
+                                                            "batting"
+                                                        )
                                                     ],
                                                     value="Runs",
                                                 ),
@@ -559,7 +767,12 @@ app.layout = html.Div(
                                         ),
                                     ],
                                 ),
-                                html.Div([dcc.Graph(id="season-graph")]),
+                                html.Div(
+                                    [
+                                        dcc.Graph(id="season-graph"),
+                                        dcc.Store(id="season-snapshot"),
+                                    ]
+                                ),
                             ],
                         ),
                         dcc.Tab(
@@ -567,13 +780,9 @@ app.layout = html.Div(
                             children=[
                                 dash_table.DataTable(
                                     id="season-records",
-                                    columns=[
-                                        {"name": i, "id": i}
-                                        for i in batting.columns
-                                        if i != "Player Link"
-                                    ],
-                                    data=batting.to_dict("records"),
-                                    sort_action="native",
+                                    # paged, sorted and filtered on the server or the browser
+                                    sort_by=[],
+                                    filter_query="",
                                     style_cell={"textAlign": "left"},
                                     style_data_conditional=[
                                         {
@@ -590,7 +799,7 @@ app.layout = html.Div(
                                     ],
                                     page_current=0,
                                     page_size=15,
-                                    page_action="native",
+                                    **season_table_actions,
                                 )
                             ],
                         ),
@@ -599,6 +808,7 @@ app.layout = html.Div(
             ],
             style={"width": "75%"},
         ),
+        form_section("batting"),
         # Features importances
         html.Div([], style={"height": "80px"}),
         html.H4("Important features for predicting players runs."),
@@ -615,21 +825,19 @@ app.layout = html.Div(
                             children=[
                                 dcc.Tab(
                                     label="Feature Importances",
-                                    children=[html.Img(src=encode_image(batting_bar))],
+                                    children=[html.Img(src=batting_bar)],
                                 ),
                                 dcc.Tab(
                                     label="FI Beeswarm",
-                                    children=[
-                                        html.Img(src=encode_image(batting_beeswarm))
-                                    ],
+                                    children=[html.Img(src=batting_beeswarm)],
                                 ),
                                 dcc.Tab(
                                     label="Ball Faced",
-                                    children=[html.Img(src=encode_image(batting_bf))],
+                                    children=[html.Img(src=batting_bf)],
                                 ),
                                 dcc.Tab(
                                     label="Strike Rate",
-                                    children=[html.Img(src=encode_image(batting_sr))],
+                                    children=[html.Img(src=batting_sr)],
                                 ),
                             ],
                         )
@@ -673,17 +881,8 @@ app.layout = html.Div(
                 html.P(""),
                 dcc.Dropdown(
                     id="select-player-wkts-ts",
-                    options=[
-                        {"label": player, "value": player}
-                        for player in bowling_players_list
-                    ],
-                    value=[
-                        "Jasprit Bumrah",
-                        "Rashid Khan",
-                        "Kagiso Rabada",
-                        "Sunil Narine",
-                        "Deepak Chahar",
-                    ],
+                    options=player_options(default_bowlers),
+                    value=default_bowlers,
                     multi=True,
                 ),
                 dcc.Graph(id="players-wickets-time-series"),
@@ -715,11 +914,12 @@ app.layout = html.Div(
                     },
                 ),
                 html.Div(
-                    [dcc.Graph(id="wickets-hist-plot", figure=wickets_histogram)],
+                    distribution_controls("wickets-hist")
+                    + [dcc.Graph(id="wickets-hist-plot")],
                     style={"width": "60%", "float": "right", "display": "inline-block"},
                 ),
             ],
-            style={"margin": "40px", "height": 500},
+            style={"margin": "40px", "height": 650},
         ),
         # Team wickets distributions
         html.Div(
@@ -744,16 +944,12 @@ app.layout = html.Div(
                     },
                 ),
                 html.Div(
-                    [
-                        dcc.Graph(
-                            id="team-wickets-dist",
-                            figure=team_wickets_dist,
-                        )
-                    ],
+                    distribution_controls("team-wickets-dist", teams=False)
+                    + [dcc.Graph(id="team-wickets-dist")],
                     style={"width": "60%", "float": "right", "display": "inline-block"},
                 ),
             ],
-            style={"margin": "40px", "height": 500},
+            style={"margin": "40px", "height": 650},
         ),
         # Bowling Leaderboard
         html.H3("Bowling Leaderboard"),
@@ -780,7 +976,9 @@ app.layout = html.Div(
                                                             "label": metric,
                                                             "value": metric,
                                                         }
-                                                        for metric in bowling_metrics_list
+                                                        for metric in metric_names(
+                                                            "bowling"
+                                                        )
                                                     ],
                                                     value="Wkts",
                                                 ),
@@ -813,6 +1011,9 @@ app.layout = html.Div(
                                         ),
                                     ]
                                 ),
+                                html.Div([], style={"height": "20px"}),
+                                html.Label("Seasons"),
+                                season_range_slider("all-time-season-range-bowling"),
                                 html.Div([dcc.Graph(id="all-time-graph-bowling")]),
                             ],
                         ),
@@ -821,12 +1022,11 @@ app.layout = html.Div(
                             children=[
                                 dash_table.DataTable(
                                     id="all-time-records-bowling",
-                                    columns=[
-                                        {"name": i, "id": i}
-                                        for i in bowling_agg.columns
-                                    ],
-                                    data=bowling_agg.to_dict("records"),
-                                    sort_action="native",
+                                    # rows are paged, sorted and filtered on the server
+                                    sort_action="custom",
+                                    sort_by=[],
+                                    filter_action="custom",
+                                    filter_query="",
                                     style_cell={
                                         "textAlign": "left",
                                     },
@@ -845,7 +1045,7 @@ app.layout = html.Div(
                                     ],
                                     page_current=0,
                                     page_size=15,
-                                    page_action="native",
+                                    page_action="custom",
                                 )
                             ],
                         ),
@@ -878,7 +1078,9 @@ app.layout = html.Div(
                                                             "label": metric,
                                                             "value": metric,
                                                         }
-                                                        for metric in bowling_metrics_list
+                                                        for metric in metric_names(
+                                                            "bowling"
+                                                        )
                                                     ],
                                                     value="Wkts",
                                                 ),
@@ -933,7 +1135,12 @@ app.layout = html.Div(
                                         ),
                                     ],
                                 ),
-                                html.Div([dcc.Graph(id="season-graph-bowling")]),
+                                html.Div(
+                                    [
+                                        dcc.Graph(id="season-graph-bowling"),
+                                        dcc.Store(id="season-snapshot-bowling"),
+                                    ]
+                                ),
                             ],
                         ),
                         dcc.Tab(
@@ -941,13 +1148,9 @@ app.layout = html.Div(
                             children=[
                                 dash_table.DataTable(
                                     id="season-records-bowling",
-                                    columns=[
-                                        {"name": i, "id": i}
-                                        for i in bowling.columns
-                                        if i != "Player Link"
-                                    ],
-                                    data=bowling.to_dict("records"),
-                                    sort_action="native",
+                                    # paged, sorted and filtered on the server or the browser
+                                    sort_by=[],
+                                    filter_query="",
                                     style_cell={"textAlign": "left"},
                                     style_data_conditional=[
                                         {
@@ -964,7 +1167,7 @@ app.layout = html.Div(
                                     ],
                                     page_current=0,
                                     page_size=15,
-                                    page_action="native",
+                                    **season_table_actions,
                                 )
                             ],
                         ),
@@ -973,6 +1176,7 @@ app.layout = html.Div(
             ],
             style={"width": "75%"},
         ),
+        form_section("bowling"),
         # bowler Performance
         html.Div([], style={"height": "80px"}),
         html.H4("Important features for predicting bowlers wickets."),
@@ -988,21 +1192,19 @@ app.layout = html.Div(
                             children=[
                                 dcc.Tab(
                                     label="Feature Importance",
-                                    children=[html.Img(src=encode_image(bowling_bar))],
+                                    children=[html.Img(src=bowling_bar)],
                                 ),
                                 dcc.Tab(
                                     label="FI Beeswarm",
-                                    children=[
-                                        html.Img(src=encode_image(bowling_beeswarm))
-                                    ],
+                                    children=[html.Img(src=bowling_beeswarm)],
                                 ),
                                 dcc.Tab(
                                     label="Strike Rate",
-                                    children=[html.Img(src=encode_image(bowling_sr))],
+                                    children=[html.Img(src=bowling_sr)],
                                 ),
                                 dcc.Tab(
                                     label="Dots",
-                                    children=[html.Img(src=encode_image(bowling_dots))],
+                                    children=[html.Img(src=bowling_dots)],
                                 ),
                             ],
                         ),
@@ -1083,11 +1285,141 @@ app.layout = html.Div(
 )
 
 
+def table_columns(columns):
+    return [{"name": i, "id": i} for i in columns]
+
+
+# props of the layout components that show the data, by component id
+def layout_props(data):
+    props = {
+        "points-table": {
+            "columns": table_columns(data["points_table"].columns),
+            "data": records(data["points_table"]),
+        },
+        "wins-losses-table": {
+            "columns": table_columns(data["wins_losses"].columns),
+            "data": records(data["wins_losses"]),
+        },
+        "season-records": {"columns": table_columns(data["batting_table_columns"])},
+        "season-records-bowling": {
+            "columns": table_columns(data["bowling_table_columns"])
+        },
+    }
+    # the all time and form tables are windows of the season range cube
+    for view, spec in leaderboard_views.items():
+        for table in ["all-time-records", "form-records"]:
+            props[table + spec["suffix"]] = {
+                "columns": table_columns(data[view + "_form"].columns)
+            }
+    if clientside_leaderboards:
+        for view, spec in leaderboard_views.items():
+            snapshot_id = "season-snapshot" + spec["suffix"]
+            props[snapshot_id] = {"data": data[view + "_snapshot"]}
+    return props
+
+
+def layout_for(data):
+    """A copy of the layout showing the data, built once per data reload."""
+    page = copy.deepcopy(layout)
+    props = layout_props(data)
+    for component in page._traverse():
+        for prop, value in props.get(getattr(component, "id", None), {}).items():
+            setattr(component, prop, value)
+    return page
+
+
+app_data["layout"] = layout_for(app_data)
+
+
+# every page load gets the layout of the current data
+def serve_layout():
+    return app_data["layout"]
+
+
+app.layout = serve_layout
+
+
 # update the points table
 @app.callback(Output("points-table", "data"), [Input("points-year-selector", "value")])
 def update_points_table(year):
-    dff = points_table[points_table["Season"] == year]
-    return dff.to_dict("records")
+    points_table = app_data["points_table"]
+    rows = np.flatnonzero(points_table["Season"].to_numpy() == year)
+    return records(points_table, rows, decimals=3)
+
+
+# bars of the precomputed bin counts, the only data the figure carries
+def histogram_figure(counts, seasons, team):
+    fig = go.Figure()
+    fig.add_trace(
+        go.Bar(
+            x=counts.edges[:-1] + counts.width / 2,
+            y=counts.histogram(seasons[0], seasons[1], team),
+            width=counts.width,
+        )
+    )
+    fig.update_layout(bargap=0)
+    return fig
+
+
+# title of a distribution plot over a range of seasons
+def distribution_title(title, seasons, team="All Teams"):
+    title = "{}({}-{})".format(title, seasons[0], seasons[1])
+    return title if team == "All Teams" else "{}, {}".format(title, team)
+
+
+# update the runs distribution plot
+@app.callback(
+    Output("runs-dist-plot", "figure"),
+    [Input("runs-dist-season-range", "value"), Input("runs-dist-team", "value")],
+)
+def update_runs_dist_plot(seasons, team):
+    fig = histogram_figure(app_data["runs_counts"], seasons, team)
+    fig.update_layout(
+        title=distribution_title("Distribution of Player Runs", seasons, team),
+        xaxis=dict(title="Runs"),
+        yaxis=dict(title="count"),
+    )
+    return fig
+
+
+# update the runs kde plot, the curves are computed once per seasons and
+# bandwidth and kept on disk
+@app.callback(
+    Output("runs-kde-plot", "figure"),
+    [Input("runs-kde-season-range", "value"), Input("runs-kde-bandwidth", "value")],
+)
+def update_runs_kde_plot(seasons, bw_adjust):
+    counts = app_data["runs_counts"]
+    teams = [team for team in counts.teams if team != "Nan"]
+    grid, teams, densities = cached_densities(
+        counts, seasons[0], seasons[1], teams, bw_adjust, kde_path
+    )
+    fig = go.Figure()
+    for team, density in zip(teams, densities):
+        fig.add_trace(
+            go.Scatter(
+                x=grid,
+                y=density,
+                mode="lines",
+                name=team_labels.get(team, team),
+                marker=dict(color=team_colors.get(team)),
+            )
+        )
+    fig.update_layout(
+        title=distribution_title("Kde Plot of Runs", seasons),
+        xaxis=dict(title="Runs"),
+        yaxis=dict(title="Density"),
+    )
+    return fig
+
+
+# search the batters as the player dropdown is typed in
+@app.callback(
+    Output("select-player-ts", "options"),
+    [Input("select-player-ts", "search_value"), Input("select-player-ts", "value")],
+)
+def update_batting_player_options(search_value, player_names):
+    return app_data["batting_player_search"].options(search_value, player_names)
 
 
 # update players runs time series chart
@@ -1095,12 +1427,16 @@ def update_points_table(year):
     Output("players-runs-time-series", "figure"), [Input("select-player-ts", "value")]
 )
 def update_players_runs_ts(player_names):
+    player_index = app_data["batting_player_index"]
     fig = go.Figure()
     for player in player_names:
+        if player not in player_index:
+            continue
+        series = player_index[player]
         fig.add_trace(
             go.Scatter(
-                x=batting[batting["PLAYER"] == player]["Season"],
-                y=batting[batting["PLAYER"] == player]["Runs"],
+                x=series["Season"],
+                y=series["Runs"],
                 mode="lines",
                 name=player,
             )
@@ -1138,161 +1474,196 @@ def update_players_runs_ts(player_names):
     return fig
 
 
-# All time Batting Graph
-@app.callback(
-    Output("all-time-graph", "figure"),
-    [
-        Input("all-time-metric-selector", "value"),
-        Input("all-time-team-selector", "value"),
-    ],
-)
-def update_all_time_graph(metric, team):
-    df = batting_agg
-    if team == "All Teams":
-        df = df.sort_values(by=metric, ascending=False)
-        top_15 = df[:15]
-        fig = go.Figure()
-        fig.add_trace(go.Bar(x=top_15[metric], y=top_15["PLAYER"], orientation="h"))
-        fig.update_layout(
-            title="Top {} Players {} (2008-2019)".format(team, metric),
-            xaxis=dict(title="{}".format(metric)),
-            yaxis=dict(autorange="reversed"),
-            height=550,
-        )
-        return fig
-
-    else:
-        team_df = batting[batting["Season"] == 2019][batting["Team"] == team]
-        # find all the unique players
-        unique_player_list = team_df["PLAYER"].unique()
-        # select only those players
-        df = df[df["PLAYER"].isin(unique_player_list)]
-        df = df.sort_values(by=metric, ascending=False)
-        fig = go.Figure()
-        fig.add_trace(
-            go.Bar(
-                x=df[metric],
-                y=df["PLAYER"],
-                orientation="h",
-            )
-        )
-        fig.update_layout(
-            title="Top {} Players {} (2008-2019)".format(team, metric),
-            xaxis=dict(title="{}".format(metric)),
-            yaxis=dict(autorange="reversed"),
-            height=550,
-        )
-        return fig
-
+# inputs of a records table that leave the graph next to it as it is
+table_props = ["page_current", "page_size", "sort_by", "filter_query"]
 
-# sort the all time table based on the metric
-@app.callback(
-    Output("all-time-records", "data"),
-    [
-        Input("all-time-metric-selector", "value"),
-        Input("all-time-team-selector", "value"),
-    ],
-)
-def update_all_time_table(metric, team):
-    df = batting_agg
-    if team == "All Teams":
-        df = df.sort_values(by=metric, ascending=False)
-        return df.to_dict("records")
 
-    else:
-        team_df = batting[batting["Season"] == 2019][batting["Team"] == team]
-        # find all the unique players
-        unique_player_list = team_df["PLAYER"].unique()
-        # select only those players
-        df = df[df["PLAYER"].isin(unique_player_list)]
-        df = df.sort_values(by=metric, ascending=False)
-        return df.to_dict("records")
+# True when only the paging, sorting or filtering of a table changed
+def table_triggered():
+    triggered = dash.callback_context.triggered
+    return bool(triggered) and all(
+        t["prop_id"].rsplit(".", 1)[-1] in table_props for t in triggered
+    )
 
 
-# Season batting graph
-@app.callback(
-    Output("season-graph", "figure"),
-    [
-        Input("season-metric-selector", "value"),
-        Input("season-year-selector", "value"),
-        Input("season-team-selector", "value"),
-    ],
-)
-def update_batting_season_graph(metric, season, team):
-    df = batting[batting["Season"] == season]
-    if team == "All Teams":
-        df = df.sort_values(by=metric, ascending=False)
-        top_15 = df[:15]
-        fig = go.Figure()
-        fig.add_trace(
-            go.Bar(
-                x=top_15[metric],
-                y=top_15["PLAYER"],
-                orientation="h",
+# the all time and season leaderboards of a view in the metric registry, the
+# graph and the page of the table of each come from one callback
+def register_leaderboard_callbacks(view):
+    spec = leaderboard_views[view]
+    suffix = spec["suffix"]
+
+    def component(name):
+        return name + suffix
+
+    def leaderboard_outputs(graph, table):
+        return [
+            Output(component(graph), "figure"),
+            Output(component(table), "data"),
+            Output(component(table), "page_count"),
+        ]
+
+    def table_inputs(table):
+        return [Input(component(table), prop) for prop in table_props]
+
+    all_time_inputs = [
+        Input(component("all-time-metric-selector"), "value"),
+        Input(component("all-time-team-selector"), "value"),
+        Input(component("all-time-season-range"), "value"),
+    ]
+
+    # All time graph and the page of its table, every range of seasons comes
+    # from the cube, a player's team is their last team in the range
+    @app.callback(
+        leaderboard_outputs("all-time-graph", "all-time-records"),
+        all_time_inputs + table_inputs("all-time-records"),
+    )
+    def update_all_time(
+        metric, team, seasons, page_current, page_size, sort_by, filter_query
+    ):
+        first, last = seasons
+        df, rows = app_data[view + "_form"].leaderboard(first, last, metric, team)
+        figure = dash.no_update
+        if not table_triggered():
+            figure = leaderboard_figure(
+                df,
+                rows,
+                metric,
+                team,
+                "Top {} Players {} ({}-{})".format(team, metric, *seasons),
             )
+        data, page_count = page_records(
+            df,
+            rows,
+            page_current,
+            page_size,
+            sort_by,
+            filter_query,
+            decimals=table_decimals,
         )
-        fig.update_layout(
-            title="Top {} Players {} ({})".format(team, metric, season),
-            xaxis=dict(title="{}".format(metric)),
-            yaxis=dict(autorange="reversed"),
-            height=550,
-        )
-        return fig
-    else:
-        df = df[df["Team"] == team]
-        df = df.sort_values(by=metric, ascending=False)
-        fig = go.Figure()
-        fig.add_trace(
-            go.Bar(
-                x=df[metric],
-                y=df["PLAYER"],
-                orientation="h",
+        return figure, data, page_count
+
+    form_inputs = [
+        Input(component("form-metric-selector"), "value"),
+        Input(component("form-season-range"), "value"),
+        Input(component("form-team-selector"), "value"),
+    ]
+
+    # Form graph, the leaderboard over the selected seasons, and its table
+    @app.callback(
+        leaderboard_outputs("form-graph", "form-records"),
+        form_inputs + table_inputs("form-records"),
+    )
+    def update_form(
+        metric, seasons, team, page_current, page_size, sort_by, filter_query
+    ):
+        first, last = seasons
+        frame, rows = app_data[view + "_form"].leaderboard(first, last, metric, team)
+        figure = dash.no_update
+        if not table_triggered():
+            figure = leaderboard_figure(
+                frame,
+                rows,
+                metric,
+                team,
+                "Top {} Players {} ({}-{})".format(team, metric, first, last),
             )
+        data, page_count = page_records(
+            frame,
+            rows,
+            page_current,
+            page_size,
+            sort_by,
+            filter_query,
+            decimals=table_decimals,
         )
-        fig.update_layout(
-            title="Top {} Players {} ({})".format(team, metric, season),
-            xaxis=dict(title="{}".format(metric)),
-            yaxis=dict(autorange="reversed"),
-            height=550,
+        return figure, data, page_count
+
+    season_inputs = [
+        Input(component("season-metric-selector"), "value"),
+        Input(component("season-year-selector"), "value"),
+        Input(component("season-team-selector"), "value"),
+    ]
+
+    if clientside_leaderboards:
+        # the same leaderboards from the snapshot, see assets/leaderboards.js
+        for output, function in [
+            (Output(component("season-graph"), "figure"), "seasonGraph"),
+            (Output(component("season-records"), "data"), "seasonTable"),
+        ]:
+            app.clientside_callback(
+                ClientsideFunction("leaderboards", function),
+                output,
+                season_inputs,
+                [State(component("season-snapshot"), "data")],
+            )
+        return
+
+    # Season graph and the page of its table
+    @app.callback(
+        leaderboard_outputs("season-graph", "season-records"),
+        season_inputs + table_inputs("season-records"),
+    )
+    def update_season(
+        metric, season, team, page_current, page_size, sort_by, filter_query
+    ):
+        data = app_data
+        rows = leaderboard_rows(data[view + "_season_index"], season, team, metric)
+        figure = dash.no_update
+        if not table_triggered():
+            figure = leaderboard_figure(
+                data[spec["season"]],
+                rows,
+                metric,
+                team,
+                "Top {} Players {} ({})".format(team, metric, season),
+            )
+        records_page, page_count = page_records(
+            data[spec["season"]],
+            rows,
+            page_current,
+            page_size,
+            sort_by,
+            filter_query,
+            data[view + "_table_columns"],
+            decimals=table_decimals,
         )
-        return fig
+        return figure, records_page, page_count
+
+
+register_leaderboard_callbacks("batting")
+
+
+######### Bowling stats
 
 
-# sort season batting table based on the metric and team, year
+# search the bowlers as the player dropdown is typed in
 @app.callback(
-    Output("season-records", "data"),
+    Output("select-player-wkts-ts", "options"),
     [
-        Input("season-metric-selector", "value"),
-        Input("season-year-selector", "value"),
-        Input("season-team-selector", "value"),
+        Input("select-player-wkts-ts", "search_value"),
+        Input("select-player-wkts-ts", "value"),
     ],
 )
-def update_season_batting_table(metric, season, team):
-    df = batting[batting["Season"] == season]
-    if team == "All Teams":
-        df = df.sort_values(by=metric, ascending=False)
-        return df.to_dict("records")
-
-    else:
-        df = df[df["Team"] == team]
-        df = df.sort_values(by=metric, ascending=False)
-        return df.to_dict("records")
+def update_bowling_player_options(search_value, player_names):
+    return app_data["bowling_player_search"].options(search_value, player_names)
 
 
-######### Bowling stats
-
 # players wickets time series
 @app.callback(
     Output("players-wickets-time-series", "figure"),
     [Input("select-player-wkts-ts", "value")],
 )
 def update_players_wickets_ts(player_names):
+    player_index = app_data["bowling_player_index"]
     fig = go.Figure()
     for player in player_names:
+        if player not in player_index:
+            continue
+        series = player_index[player]
         fig.add_trace(
             go.Scatter(
-                x=bowling[bowling["PLAYER"] == player]["Season"],
-                y=bowling[bowling["PLAYER"] == player]["Wkts"],
+                x=series["Season"],
+                y=series["Wkts"],
                 mode="lines",
                 name=player,
             )
@@ -1307,180 +1678,129 @@ def update_players_wickets_ts(player_names):
     return fig
 
 
-# All time Bowling Graph
+# update the wickets histogram
 @app.callback(
-    Output("all-time-graph-bowling", "figure"),
-    [
-        Input("all-time-metric-selector-bowling", "value"),
-        Input("all-time-team-selector-bowling", "value"),
-    ],
+    Output("wickets-hist-plot", "figure"),
+    [Input("wickets-hist-season-range", "value"), Input("wickets-hist-team", "value")],
 )
-def update_all_time_graph_bowling(metric, team):
-    df = bowling_agg
-    # Select only non-zero values
-    df = df[df[metric] != 0]
-    # reverse logic for these metrics, less is better
-    rev_metrics = ["Econ", "Avg", "SR", "Runs/Inns"]
-    if metric in rev_metrics:
-        asc = True
-    else:
-        asc = False
+def update_wickets_histogram(seasons, team):
+    fig = histogram_figure(app_data["wickets_counts"], seasons, team)
+    fig.update_layout(
+        title=distribution_title("Number of Wickets In A Season", seasons, team),
+        yaxis=dict(title="Player Count"),
+        xaxis=dict(title="Number Of Wickets"),
+    )
+    return fig
 
-    if team == "All Teams":
-        df = df.sort_values(by=metric, ascending=asc)
-        top_15 = df[:15]
-        fig = go.Figure()
-        fig.add_trace(go.Bar(x=top_15[metric], y=top_15["PLAYER"], orientation="h"))
-        fig.update_layout(
-            title="Top {} Players {} (2008-2019)".format(team, metric),
-            xaxis=dict(title="{}".format(metric)),
-            yaxis=dict(autorange="reversed"),
-            height=550,
-        )
-        return fig
-
-    else:
-        team_df = bowling[bowling["Season"] == 2019][bowling["Team"] == team]
-        # find all the unique players
-        unique_player_list = team_df["PLAYER"].unique()
-        # select only those players
-        df = df[df["PLAYER"].isin(unique_player_list)]
-        df = df.sort_values(by=metric, ascending=asc)
-        fig = go.Figure()
-        fig.add_trace(
-            go.Bar(
-                x=df[metric],
-                y=df["PLAYER"],
-                orientation="h",
-            )
+
+# update the wickets distribution of every team, from precomputed quartiles
+@app.callback(
+    Output("team-wickets-dist", "figure"),
+    [Input("team-wickets-dist-season-range", "value")],
+)
+def update_team_wickets_dist(seasons):
+    counts = app_data["wickets_counts"]
+    teams = [team for team in counts.teams if team != "Nan"]
+    stats = counts.box_stats(seasons[0], seasons[1], teams)
+    color = "#636efa"
+    fig = go.Figure()
+    fig.add_trace(
+        go.Box(
+            y=stats["Team"],
+            q1=stats["q1"],
+            median=stats["median"],
+            q3=stats["q3"],
+            lowerfence=stats["lowerfence"],
+            upperfence=stats["upperfence"],
+            orientation="h",
+            marker_color=color,
+            name="Wkts",
         )
-        fig.update_layout(
-            title="Top {} Players {} (2008-2019)".format(team, metric),
-            xaxis=dict(title="{}".format(metric)),
-            yaxis=dict(autorange="reversed"),
-            height=550,
+    )
+    # the outlying values, each drawn once
+    fig.add_trace(
+        go.Scatter(
+            x=np.concatenate([[]] + list(stats["outliers"])),
+            y=np.repeat(stats["Team"].to_numpy(), stats["outliers"].map(len)),
+            mode="markers",
+            marker_color=color,
+            name="Outliers",
         )
-        return fig
+    )
+    fig.update_layout(
+        title=distribution_title("Wickets Taken Per Season ", seasons),
+        yaxis=dict(title="Players Team"),
+        xaxis=dict(title="Total Wickets"),
+        showlegend=False,
+    )
+    return fig
 
 
-# sort the all time bowling table based on the metric
-@app.callback(
-    Output("all-time-records-bowling", "data"),
-    [
-        Input("all-time-metric-selector-bowling", "value"),
-        Input("all-time-team-selector-bowling", "value"),
-    ],
+register_leaderboard_callbacks("bowling")
+
+
+# encode the callback responses with the fast encoder
+serialize_callbacks(app)
+
+# answer callbacks from the files written by static_export.py when configured
+if os.environ.get("STATIC_EXPORT_DIR"):
+    serve_exported(app, os.environ["STATIC_EXPORT_DIR"])
+
+# cache the serialized response of every callback, keyed on its inputs
+callback_cache = CallbackCache(
+    max_size=int(os.environ.get("CALLBACK_CACHE_SIZE", 1024))
 )
-def update_all_time_table_bowling(metric, team):
-    df = bowling_agg
-    # Select only non-zero values
-    df = df[df[metric] != 0]
-    # reverse logic for these metrics, less is better
-    rev_metrics = ["Econ", "Avg", "SR", "Runs/Inns"]
-    if metric in rev_metrics:
-        asc = True
-    else:
-        asc = False
+cache_callbacks(app, callback_cache)
 
-    if team == "All Teams":
-        df = df.sort_values(by=metric, ascending=asc)
-        return df.to_dict("records")
 
-    else:
-        team_df = bowling[bowling["Season"] == 2019][bowling["Team"] == team]
-        # find all the unique players
-        unique_player_list = team_df["PLAYER"].unique()
-        # select only those players
-        df = df[df["PLAYER"].isin(unique_player_list)]
-        df = df.sort_values(by=metric, ascending=asc)
-        return df.to_dict("records")
+# hit, miss and eviction counters of the callback cache
+@server.route("/cache-stats")
+def cache_stats():
+    return flask.jsonify(callback_cache.stats())
 
 
-# Season bowling graph
-@app.callback(
-    Output("season-graph-bowling", "figure"),
-    [
-        Input("season-metric-selector-bowling", "value"),
-        Input("season-year-selector-bowling", "value"),
-        Input("season-team-selector-bowling", "value"),
-    ],
+# time every request, cache hits included
+instrument_callbacks(app, callback_metrics)
+callback_metrics.add_gauges(
+    "callback_cache", "Callback cache counters.", callback_cache.stats
 )
-def update_batting_season_graph(metric, season, team):
-    df = bowling[bowling["Season"] == season]
-    # Select only non-zero values
-    df = df[df[metric] != 0]
-    rev_metrics = ["Econ", "Avg", "SR", "Runs/Inns"]
-    if metric in rev_metrics:
-        asc = True
-    else:
-        asc = False
 
-    if team == "All Teams":
-        df = df.sort_values(by=metric, ascending=asc)
-        top_15 = df[:15]
-        fig = go.Figure()
-        fig.add_trace(
-            go.Bar(
-                x=top_15[metric],
-                y=top_15["PLAYER"],
-                orientation="h",
-            )
-        )
-        fig.update_layout(
-            title="Top {} Players {} ({})".format(team, metric, season),
-            xaxis=dict(title="{}".format(metric)),
-            yaxis=dict(autorange="reversed"),
-            height=550,
-        )
-        return fig
-    else:
-        df = df[df["Team"] == team]
-        df = df.sort_values(by=metric, ascending=asc)
-        fig = go.Figure()
-        fig.add_trace(
-            go.Bar(
-                x=df[metric],
-                y=df["PLAYER"],
-                orientation="h",
-            )
-        )
-        fig.update_layout(
-            title="Top {} Players {} ({})".format(team, metric, season),
-            xaxis=dict(title="{}".format(metric)),
-            yaxis=dict(autorange="reversed"),
-            height=550,
-        )
-        return fig
 
+# rebuild the data affected by changed csv files and swap it in
+def reload_data(changed_files):
+    global app_data
+    names = affected_tables(changed_files)
+    tables = reload_tables(app_data["tables"], names)
+    data = build_data(tables, app_data, names)
+    data["layout"] = layout_for(data)
+    # one assignment, callbacks read either the old or the new data
+    app_data = data
+    # responses computed from the old data
+    forget_exported()
+    callback_cache.clear()
 
-# sort season bowling table based on the metric and team, year
-@app.callback(
-    Output("season-records-bowling", "data"),
-    [
-        Input("season-metric-selector-bowling", "value"),
-        Input("season-year-selector-bowling", "value"),
-        Input("season-team-selector-bowling", "value"),
-    ],
+
+data_watcher = DataWatcher(
+    reload_data, interval=float(os.environ.get("DATA_RELOAD_INTERVAL", 10))
+)
+callback_metrics.add_gauges(
+    "data_reload", "Reloads of the csv files in data/.", data_watcher.stats
 )
-def update_season_batting_table(metric, season, team):
-    df = bowling[bowling["Season"] == season]
-    # Select only non-zero values
-    df = df[df[metric] != 0]
-    # reverse logic for these metrics, less is better
-    rev_metrics = ["Econ", "Avg", "SR", "Runs/Inns"]
-    if metric in rev_metrics:
-        asc = True
-    else:
-        asc = False
 
-    if team == "All Teams":
-        df = df.sort_values(by=metric, ascending=asc)
-        return df.to_dict("records")
 
-    else:
-        df = df[df["Team"] == team]
-        df = df.sort_values(by=metric, ascending=asc)
-        return df.to_dict("records")
+# threads don't survive a fork, so watch from the worker serving requests
+@server.before_first_request
+def start_data_watcher():
+    data_watcher.start()
+
+
+# per callback histograms in the Prometheus text format
+@server.route("/metrics")
+def metrics():
+    return flask.Response(
+        callback_metrics.exposition(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+
+def scott_bandwidth(values, counts):
+    """Scott's rule bandwidth of every row of counts, the weights of values.
+
+    The standard deviation times n ** -1/5, as scipy's gaussian_kde.
+    """
+    n = counts.sum(axis=1)
+    mean = counts @ values / n
+    var = (counts * (values[None, :] - mean[:, None]) ** 2).sum(axis=1) / (n - 1)
+    return np.sqrt(var) * n**-0.2
+
+
+def kde_curves(values, counts, grid, bandwidths):
+    """Gaussian kernel densities on grid of every row of counts, the weights
+    of values, in one batched operation."""
+    z = (grid[None, :, None] - values[None, None, :]) / bandwidths[:, None, None]
+    densities = np.einsum("tgv,tv->tg", np.exp(-0.5 * z**2), counts)
+    return densities / (counts.sum(axis=1) * bandwidths * np.sqrt(2 * np.pi))[:, None]
+
+
+def team_densities(value_counts, first, last, teams, bw_adjust=1, points=200):
+    """Densities of each of teams over the seasons first to last.
+
+    value_counts is a distributions.ValueCounts, bw_adjust scales Scott's
+    rule. Returns the grid shared by the curves, the teams with 2 rows or
+    more and a team x grid array of their densities.
+    """
+    counts = value_counts.team_counts(first, last)
+    keep = np.isin(value_counts.teams, teams) & (counts.sum(axis=1) >= 2)
+    counts = counts[keep].astype("float64")
+    kept = list(value_counts.teams[keep])
+    present = counts.sum(axis=0) > 0
+    if not kept or not present.any():
+        return np.empty(0), kept, np.empty((len(kept), 0))
+    values = value_counts.values[present]
+    counts = counts[:, present]
+    grid = np.linspace(values[0], values[-1], points)
+    bandwidths = bw_adjust * scott_bandwidth(values, counts)
+    return grid, kept, kde_curves(values, counts, grid, bandwidths)
+
+
+def counts_key(value_counts):
+    """Hash of the counts the densities are computed from."""
+    digest = hashlib.sha1(value_counts.values.tobytes())
+    digest.update(value_counts.counts.tobytes())
+    digest.update(json.dumps(list(value_counts.teams)).encode())
+    return digest.hexdigest()[:16]
+
+
+def cached_densities(value_counts, first, last, teams, bw_adjust, path):
+    """team_densities, read back from a .npz file under path once computed.
+
+    Files are keyed by the hash of the counts and the arguments, so worker
+    processes and restarts share the curves. Files of older counts are
+    removed when new ones are written, nothing is written when path can't
+    be.
+    """
+    data_key = counts_key(value_counts)
+    args = json.dumps([int(first), int(last), list(teams), float(bw_adjust)])
+    args_key = hashlib.sha1(args.encode()).hexdigest()[:16]
+    curves_path = os.path.join(path, "{}-{}.npz".format(data_key, args_key))
+    try:
+        with np.load(curves_path) as cached:
+            return cached["grid"], list(cached["teams"]), cached["densities"]
+    except (OSError, ValueError, KeyError):
+        pass
+    grid, kept, densities = team_densities(value_counts, first, last, teams, bw_adjust)
+    try:
+        os.makedirs(path, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".kde-", suffix=".npz", dir=path)
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, grid=grid, teams=np.array(kept, dtype=str), densities=densities)
+        os.replace(tmp_path, curves_path)
+        for name in os.listdir(path):
+            if not name.startswith((data_key, ".")):
+                os.remove(os.path.join(path, name))
+    except OSError:
+        # read only data directory, computed again next time
+        pass
+    return grid, kept, densities
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from serialization import column_values
+
+ALL_TEAMS = "All Teams"
+
+
+def sort_order(values, ascending):
+    """Return the positions that sort the values, missing values always last."""
+    values = np.asarray(values, dtype="float64")
+    if ascending:
+        return np.argsort(values, kind="stable")
+    return np.argsort(-values, kind="stable")
+
+
+def metric_order(values, metric):
+    """Positions of values in the metric's leaderboard order, zeros left out
+    if the metric excludes them."""
+    values = np.asarray(values, dtype="float64")
+    order = sort_order(values, metric.ascending)
+    if metric.exclude_zeros:
+        order = order[values[order] != 0]
+    return order
+
+
+def build_leaderboard_index(df, metrics, season_col="Season", team_col="Team"):
+    """Sort every metric once and split the order by season and team.
+
+    Returns a dict keyed by (season, team, metric name) holding the row
+    positions of df in leaderboard order. The "All Teams" key holds the
+    whole season. metrics are Metric specs from metric_registry.
+    """
+    seasons = df[season_col].to_numpy()
+    teams = df[team_col].to_numpy()
+
+    # boolean row masks for every (season, team) group
+    groups = {}
+    for season in np.unique(seasons):
+        season_mask = seasons == season
+        groups[(int(season), ALL_TEAMS)] = season_mask
+        for team in np.unique(teams[season_mask]):
+            groups[(int(season), team)] = season_mask & (teams == team)
+
+    index = {}
+    for metric in metrics:
+        # one global sort, then a stable filter keeps each group sorted
+        order = metric_order(df[metric.name], metric)
+        for (season, team), mask in groups.items():
+            index[(season, team, metric.name)] = order[mask[order]]
+    return index
+
+
+def leaderboard_rows(index, season, team, metric):
+    """Return the sorted row positions for a leaderboard."""
+    return index.get((season, team, metric), np.empty(0, dtype=np.intp))
+
+
+def leaderboard_snapshot(df, columns, metrics):
+    """Columnar copy of df for leaderboards sorted in the browser.
+
+    Categorical columns are sent once as their categories plus integer codes
+    (-1 when missing), missing numbers become null. The sort direction and
+    zero rule of every metric are sent along.
+    """
+    data = {}
+    for col in columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            data[col] = {
+                "categories": series.cat.categories.tolist(),
+                "codes": series.cat.codes.tolist(),
+            }
+        else:
+            data[col] = column_values(series)
+    return {
+        "columns": list(columns),
+        "data": data,
+        "ascending": {metric.name: metric.ascending for metric in metrics},
+        "exclude_zeros": {metric.name: metric.exclude_zeros for metric in metrics},
+    }
@@ -0,0 +1,135 @@
+from collections import namedtuple
+
+import numpy as np
+
+# a leaderboard metric: ascending when less is better, exclude_zeros leaves
+# out the rows where it is 0 and combine says how season rows add up over
+# several seasons: "sum", "max" or a function of the summed columns
+Metric = namedtuple(
+    "Metric",
+    ["name", "ascending", "exclude_zeros", "combine"],
+    defaults=(False, False, "sum"),
+)
+
+
+def overs_to_balls(overs):
+    """Balls bowled from overs written as x.y, 3.4 overs are 22 balls."""
+    overs = np.asarray(overs, dtype="float64")
+    whole = np.floor(overs + 1e-9)
+    return whole * 6 + np.round((overs - whole) * 10)
+
+
+def balls_to_overs(balls):
+    balls = np.asarray(balls, dtype="float64")
+    return balls // 6 + (balls % 6) / 10
+
+
+def ratio(numerator, denominator, scale=1):
+    """combine for a ratio metric, the ratio of the summed columns.
+
+    Undefined, NaN, where the denominator sums to 0.
+    """
+
+    def combine(sums):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = scale * sums[numerator] / sums[denominator]
+        return np.where(sums[denominator] > 0, values, np.nan)
+
+    combine.columns = [numerator, denominator]
+    return combine
+
+
+def overs(sums):
+    return balls_to_overs(sums["Balls"])
+
+
+overs.columns = ["Balls"]
+
+
+# columns summed along with the metrics, computed from the season rows
+def outs(df):
+    return df["Inns"] - df["NO"]
+
+
+def balls(df):
+    return overs_to_balls(df["Ov"])
+
+
+batting_metrics = [
+    Metric("Runs"),
+    Metric("HS", combine="max"),
+    Metric("Avg", combine=ratio("Runs", "Outs")),
+    Metric("BF"),
+    Metric("SR", combine=ratio("Runs", "BF", 100)),
+    Metric("100"),
+    Metric("50"),
+    Metric("4s"),
+    Metric("6s"),
+    Metric("Mat"),
+    Metric("Inns"),
+    Metric("NO"),
+]
+
+# bowlers who never bowled a ball have zeros everywhere, they're left out
+bowling_metrics = [
+    Metric("Wkts", exclude_zeros=True),
+    Metric(
+        "Econ", ascending=True, exclude_zeros=True, combine=ratio("Runs", "Balls", 6)
+    ),
+    Metric("Avg", ascending=True, exclude_zeros=True, combine=ratio("Runs", "Wkts")),
+    Metric("SR", ascending=True, exclude_zeros=True, combine=ratio("Balls", "Wkts")),
+    Metric(
+        "Runs/Inns", ascending=True, exclude_zeros=True, combine=ratio("Runs", "Inns")
+    ),
+    Metric("Dots", exclude_zeros=True),
+    Metric("4w", exclude_zeros=True),
+    Metric("5w", exclude_zeros=True),
+    Metric("Maiden", exclude_zeros=True),
+    Metric("Ov", exclude_zeros=True, combine=overs),
+]
+
+# every leaderboard view: the season and all time tables it ranks, its
+# metrics, the columns its ratios need, the counting columns shown with the
+# metrics over a range of seasons and the suffix of its component ids
+leaderboard_views = {
+    "batting": {
+        "season": "batting",
+        "all_time": "batting_agg",
+        "metrics": batting_metrics,
+        "components": {"Outs": outs},
+        "counts": [],
+        "suffix": "",
+    },
+    "bowling": {
+        "season": "bowling",
+        "all_time": "bowling_agg",
+        "metrics": bowling_metrics,
+        "components": {"Balls": balls},
+        "counts": ["Mat", "Inns", "Runs"],
+        "suffix": "-bowling",
+    },
+}
+
+
+def metric_names(view):
+    return [metric.name for metric in leaderboard_views[view]["metrics"]]
+
+
+def derive_metrics(df, metrics, components=None, replace=False):
+    """Add the metrics missing from df, combined from its columns, in place.
+
+    A ratio of a career is the ratio of the career sums, not the mean of the
+    season ratios. With replace, metrics already in df are computed again.
+    """
+    components = components or {}
+    for metric in metrics:
+        if callable(metric.combine) and (replace or metric.name not in df):
+            sums = {
+                col: np.asarray(
+                    components[col](df) if col in components else df[col],
+                    dtype="float64",
+                )
+                for col in metric.combine.columns
+            }
+            df[metric.name] = np.round(metric.combine(sums), 2)
+    return df
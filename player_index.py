@@ -0,0 +1,14 @@
+
+def build_player_index(df, columns, player_col="PLAYER"):
+    """Map every player to the values of the given columns, in row order.
+
+    Built with a single groupby, so looking up a player's seasons is a dict
+    access instead of a scan over the whole frame.
+    """
+    positions = df.groupby(player_col, sort=False, observed=True).indices
+    arrays = {col: df[col].to_numpy() for col in columns}
+    return {
+        player: {col: values[rows] for col, values in arrays.items()}
+        for player, rows in positions.items()
+    }
+
@@ -0,0 +1,71 @@
+import bisect
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+
+def normalize(text):
+    """Lowercase text without accents, so "jose" finds "José"."""
+    text = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in text if not unicodedata.combining(c)).lower().strip()
+
+
+def career_totals(players, agg_df, column, player_col="PLAYER"):
+    """The column of agg_df for every player, 0 for players missing from it."""
+    totals = pd.Series(
+        agg_df[column].to_numpy(dtype="float64"),
+        index=np.asarray(agg_df[player_col], dtype=object),
+    )
+    return totals.reindex(players).fillna(0).to_numpy()
+
+
+class PlayerSearch:
+    """Find players by the start of their name or of any word in it.
+
+    Players are ranked by a career total, best first. Every name and every
+    word of it is kept in one sorted list of keys, so the players matching a
+    prefix are one contiguous slice found by bisection, whatever the number
+    of players.
+    """
+
+    def __init__(self, players, totals):
+        totals = np.nan_to_num(np.asarray(totals, dtype="float64"))
+        order = np.argsort(-totals, kind="stable")
+        # players by rank, a match is reported as its rank
+        self.players = [players[i] for i in order]
+
+        entries = set()
+        for rank, player in enumerate(self.players):
+            name = normalize(player)
+            entries.add((name, rank))
+            for i, char in enumerate(name):
+                if char == " " and name[i + 1 : i + 2] not in ("", " "):
+                    entries.add((name[i + 1 :], rank))
+        entries = sorted(entries)
+        self._keys = [key for key, _ in entries]
+        self._ranks = np.array([rank for _, rank in entries], dtype=np.intp)
+
+    def search(self, query, limit=20):
+        """The best ranked players matching query, the top ones if it's empty."""
+        query = normalize(query or "")
+        if not query:
+            return self.players[:limit]
+        start = bisect.bisect_left(self._keys, query)
+        # every key starting with query sorts before query + the largest char
+        stop = bisect.bisect_left(self._keys, query + "\U0010ffff", start)
+        ranks = np.unique(self._ranks[start:stop])[:limit]
+        return [self.players[rank] for rank in ranks]
+
+    def options(self, query, selected=None, limit=20):
+        """Dropdown options for query, the selected players always included."""
+        selected = list(selected or [])
+        players = (
+            selected
+            + [
+                player
+                for player in self.search(query, limit + len(selected))
+                if player not in selected
+            ][:limit]
+        )
+        return [{"label": player, "value": player} for player in players]
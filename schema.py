@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+# repeated player strings are stored once as categories
+player_columns = {
+    "PLAYER": "category",
+    "Team": "category",
+    "Nationality": "category",
+    "Player Link": "category",
+}
+
+# ratio columns like Avg, SR and Econ stay float64 so they display as scraped
+table_schemas = {
+    "batting": {
+        **player_columns,
+        "POS": "uint16",
+        "Mat": "uint8",
+        "Inns": "uint8",
+        "NO": "uint8",
+        "Runs": "uint16",
+        "HS": "uint16",
+        "BF": "uint16",
+        "100": "uint8",
+        "50": "uint8",
+        "4s": "uint16",
+        "6s": "uint16",
+        "Season": "uint16",
+    },
+    "batting_agg": {
+        "PLAYER": "category",
+        "Mat": "uint16",
+        "Inns": "uint16",
+        "NO": "uint16",
+        "Runs": "uint16",
+        "HS": "uint16",
+        "BF": "uint16",
+        "100": "uint8",
+        "50": "uint8",
+        "4s": "uint16",
+        "6s": "uint16",
+    },
+    "bowling": {
+        **player_columns,
+        "POS": "uint16",
+        "Mat": "uint8",
+        "Inns": "uint8",
+        "Runs": "uint16",
+        "Wkts": "uint8",
+        "BBI": "uint8",
+        "4w": "uint8",
+        "5w": "uint8",
+        "Dots": "uint16",
+        "Maiden": "uint8",
+        "Season": "uint16",
+    },
+    "bowling_agg": {
+        **player_columns,
+        "BBI": "category",
+        "POS": "uint16",
+        "Mat": "uint16",
+        "Inns": "uint16",
+        "Runs": "uint16",
+        "Wkts": "uint16",
+        "4w": "uint8",
+        "5w": "uint8",
+        "Dots": "uint16",
+        "Maiden": "uint8",
+    },
+}
+
+
+def cast_column(series, dtype):
+    """Cast a column to the schema dtype, keeping it as is if the values don't fit."""
+    if dtype == "category":
+        return series.astype("category")
+    info = np.iinfo(dtype)
+    values = series.to_numpy()
+    if (
+        series.isna().any()
+        or (values % 1 != 0).any()
+        or values.min() < info.min
+        or values.max() > info.max
+    ):
+        return series
+    return series.astype(dtype)
+
+
+def apply_schema(df, schema):
+    """Return a copy of df with its columns cast to the schema dtypes."""
+    df = df.copy()
+    for col, dtype in schema.items():
+        if col in df.columns and len(df):
+            df[col] = cast_column(df[col], dtype)
+    return df
+
+
+def apply_schemas(tables):
+    """Cast every table that has a schema."""
+    return {
+        name: apply_schema(df, table_schemas[name]) if name in table_schemas else df
+        for name, df in tables.items()
+    }
+
+
+def memory_report(before, after):
+    """Memory of every table in bytes before and after casting."""
+    report = pd.DataFrame(
+        {
+            "before": {
+                name: df.memory_usage(deep=True).sum() for name, df in before.items()
+            },
+            "after": {
+                name: df.memory_usage(deep=True).sum() for name, df in after.items()
+            },
+        }
+    )
+    report.loc["total"] = report.sum()
+    report["saved %"] = (100 * (1 - report["after"] / report["before"])).round(1)
+    return report
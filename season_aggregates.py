@@ -0,0 +1,346 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from metric_registry import batting_metrics, leaderboard_views
+
+# the columns of the all time batting record, each combined over the seasons
+# like the leaderboards combine it: sums, maxima and ratios of sums
+batting_columns = [
+    "Mat",
+    "Inns",
+    "NO",
+    "Runs",
+    "HS",
+    "Avg",
+    "BF",
+    "SR",
+    "100",
+    "50",
+    "4s",
+    "6s",
+]
+batting_aggregates = {
+    metric.name: metric.combine
+    for metric in sorted(batting_metrics, key=lambda m: batting_columns.index(m.name))
+}
+batting_components = leaderboard_views["batting"]["components"]
+
+
+def state_columns(aggregates, components=None):
+    """The columns kept per player, a ratio is kept as the sums it divides.
+
+    The ":rows" column counts the rows of the player, players whose seasons
+    were all taken back have none.
+    """
+    columns = [":rows"]
+    for col, how in aggregates.items():
+        columns += how.columns if callable(how) else [col]
+    columns += list(components or {})
+    return list(dict.fromkeys(columns))
+
+
+def season_partial(rows, aggregates, components=None, player_col="PLAYER"):
+    """Aggregate the rows of one season to one state row per player."""
+    columns = state_columns(aggregates, components)
+    grouped = rows.groupby(player_col, sort=True)
+    state = {":rows": grouped.size()}
+    for col in columns[1:]:
+        how = "max" if aggregates.get(col) == "max" else "sum"
+        state[col] = grouped[col].agg(how)
+    return pd.DataFrame(state, columns=columns).astype("float64")
+
+
+def season_hash(rows):
+    return str(int(pd.util.hash_pandas_object(rows, index=False).sum()))
+
+
+class SeasonAggregates:
+    """All time totals per player of a per season table, a season at a time.
+
+    aggregates maps every output column to "sum", "max" or a ratio combine
+    from metric_registry, components adds columns computed from the season
+    rows that ratios divide. Sums, maxima and the sums behind ratios are
+    kept per player, so folding in a season only touches that season's
+    rows, and two aggregators of different seasons merge by adding up. The
+    per season partial aggregates are kept as well, the totals of any range
+    of seasons are rebuilt from them.
+    """
+
+    def __init__(
+        self, aggregates, components=None, player_col="PLAYER", season_col="Season"
+    ):
+        self.aggregates = aggregates
+        self.components = components or {}
+        self.player_col = player_col
+        self.season_col = season_col
+        self.columns = state_columns(aggregates, self.components)
+        self.players = []
+        self.hashes = {}
+        self.dtypes = {}
+        self.path = None
+        self._partials = {}
+        self._rows = {}
+        self._totals = np.zeros((0, len(self.columns)))
+        # maxima combine with fmax, everything else adds up
+        self._is_max = np.array(
+            [aggregates.get(col) == "max" for col in self.columns], dtype=bool
+        )
+
+    @property
+    def seasons(self):
+        return sorted(self.hashes)
+
+    def partial(self, season):
+        """The state rows of one season, read from disk the first time."""
+        partial = self._partials.get(season)
+        if partial is None:
+            partial_path = os.path.join(self.path, "season_{}.csv".format(season))
+            partial = self._partials[season] = pd.read_csv(partial_path, index_col=0)
+        return partial
+
+    def _player_rows(self, players):
+        rows = np.empty(len(players), dtype=np.intp)
+        for i, player in enumerate(players):
+            row = self._rows.get(player)
+            if row is None:
+                row = self._rows[player] = len(self.players)
+                self.players.append(player)
+            rows[i] = row
+        if len(self.players) > len(self._totals):
+            grown = np.zeros(
+                (max(len(self.players), 2 * len(self._totals)), len(self.columns))
+            )
+            grown[: len(self._totals)] = self._totals
+            self._totals = grown
+        return rows
+
+    def _fold(self, partial, sign=1):
+        rows = self._player_rows(partial.index)
+        values = partial.to_numpy()
+        totals = self._totals[rows]
+        totals[:, ~self._is_max] += sign * values[:, ~self._is_max]
+        if sign > 0:
+            totals[:, self._is_max] = np.fmax(
+                totals[:, self._is_max], values[:, self._is_max]
+            )
+        self._totals[rows] = totals
+
+    def add_season(self, season, rows):
+        """Fold in the rows of one season, replacing it if already folded in.
+
+        rows need the component columns, update adds them.
+        """
+        season = int(season)
+        for col, how in self.aggregates.items():
+            if not callable(how):
+                self.dtypes.setdefault(col, str(rows[col].dtype))
+        partial = season_partial(
+            rows, self.aggregates, self.components, self.player_col
+        )
+        self._add_partial(season, partial, season_hash(rows))
+
+    def merge(self, other):
+        """Fold in the seasons aggregated by other, say in another process."""
+        for col, dtype in other.dtypes.items():
+            self.dtypes.setdefault(col, dtype)
+        for season in other.seasons:
+            if self.hashes.get(season) != other.hashes[season]:
+                self._add_partial(season, other.partial(season), other.hashes[season])
+
+    def remove_season(self, season):
+        """Take back the rows of a season folded in before."""
+        old = self.partial(season)
+        self._fold(old, sign=-1)
+        del self.hashes[season]
+        del self._partials[season]
+        self._redo_maxima(old.index)
+
+    def _add_partial(self, season, partial, digest):
+        old = self.partial(season) if season in self.hashes else None
+        if old is not None:
+            self._fold(old, sign=-1)
+        self._partials[season] = partial
+        self.hashes[season] = digest
+        self._fold(partial)
+        if old is not None:
+            self._redo_maxima(old.index)
+
+    def _redo_maxima(self, players):
+        # maxima can't be taken back, redo them from the remaining seasons
+        if not self._is_max.any():
+            return
+        max_columns = [col for col, how in self.aggregates.items() if how == "max"]
+        max_index = np.flatnonzero(self._is_max)
+        # players with no seasons left start over from 0, like new players
+        self._totals[np.ix_(self._player_rows(players), max_index)] = 0
+        maxima = self.season_range(players=players)[max_columns]
+        rows = self._player_rows(maxima.index)
+        self._totals[np.ix_(rows, max_index)] = maxima
+
+    def update(self, df):
+        """Fold in the seasons of df that are new or changed, and take back
+        the seasons no longer in df.
+
+        Returns the seasons folded in or taken back. Finding them hashes
+        every row, only the rows of those seasons are aggregated.
+        """
+        df = df.assign(
+            **{col: component(df) for col, component in self.components.items()}
+        )
+        columns = [self.player_col] + self.columns[1:]
+        folded = []
+        for season, rows in df.groupby(self.season_col, sort=True):
+            season = int(season)
+            rows = rows[columns]
+            if self.hashes.get(season) != season_hash(rows):
+                self.add_season(season, rows)
+                folded.append(season)
+        seasons = set(int(season) for season in df[self.season_col].unique())
+        for season in self.seasons:
+            if season not in seasons:
+                self.remove_season(season)
+                folded.append(season)
+        return folded
+
+    def _finish(self, state):
+        """Turn state rows into the aggregated columns, ratios divided out."""
+        state = state[state[":rows"] > 0]
+        sums = {col: state[col].to_numpy() for col in self.columns}
+        totals = pd.DataFrame(index=state.index)
+        for col, how in self.aggregates.items():
+            if callable(how):
+                values = how(sums)
+            else:
+                values = state[col]
+                if self.dtypes.get(col, "")[:3] in ("int", "uin"):
+                    values = values.astype("int64")
+            totals[col] = values
+        totals.index.name = self.player_col
+        return totals
+
+    def totals(self):
+        """One row per player over all the seasons folded in, by player name."""
+        state = pd.DataFrame(
+            self._totals[: len(self.players)], index=self.players, columns=self.columns
+        )
+        return self._finish(state.sort_index())
+
+    def season_range(self, first=None, last=None, players=None):
+        """One row per player over the seasons first to last, inclusive."""
+        partials = [
+            self.partial(season)
+            for season in self.seasons
+            if (first is None or season >= first) and (last is None or season <= last)
+        ]
+        if not partials:
+            return self._finish(pd.DataFrame(columns=self.columns, dtype="float64"))
+        state = pd.concat(partials)
+        if players is not None:
+            state = state[state.index.isin(players)]
+        how = {
+            col: "max" if is_max else "sum"
+            for col, is_max in zip(self.columns, self._is_max)
+        }
+        return self._finish(state.groupby(level=0, sort=True).agg(how))
+
+    def save(self, path):
+        """Write the totals, the season partials and the hashes to path.
+
+        Everything is written to a temporary directory and renamed into
+        place, so readers never see half written files. Partials already
+        saved are copied over rather than written again.
+        """
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(prefix=".aggregates-", dir=parent)
+        old_path = None
+        try:
+            state = pd.DataFrame(
+                self._totals[: len(self.players)],
+                index=self.players,
+                columns=self.columns,
+            )
+            state.to_csv(
+                os.path.join(tmp_path, "totals.csv"), index_label=self.player_col
+            )
+            for season in self.seasons:
+                name = "season_{}.csv".format(season)
+                if season in self._partials:
+                    self._partials[season].to_csv(
+                        os.path.join(tmp_path, name), index_label=self.player_col
+                    )
+                else:
+                    shutil.copyfile(
+                        os.path.join(self.path, name), os.path.join(tmp_path, name)
+                    )
+            with open(os.path.join(tmp_path, "seasons.json"), "w") as f:
+                json.dump(
+                    {
+                        "hashes": self.hashes,
+                        "dtypes": self.dtypes,
+                        "columns": self.columns,
+                    },
+                    f,
+                    indent=2,
+                )
+
+            # swap the new state in place of the old one
+            if os.path.exists(path):
+                old_path = tempfile.mkdtemp(prefix=".aggregates-old-", dir=parent)
+                os.rename(path, os.path.join(old_path, "aggregates"))
+            os.rename(tmp_path, path)
+        except OSError:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        finally:
+            if old_path is not None:
+                shutil.rmtree(old_path, ignore_errors=True)
+        self.path = path
+
+    @classmethod
+    def load(
+        cls, path, aggregates, components=None, player_col="PLAYER", season_col="Season"
+    ):
+        """Read the state written by save, a new empty one if there is none."""
+        self = cls(aggregates, components, player_col, season_col)
+        try:
+            with open(os.path.join(path, "seasons.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return self
+        if meta["columns"] != self.columns:
+            # the aggregates changed, start over
+            return self
+        state = pd.read_csv(os.path.join(path, "totals.csv"), index_col=0)
+        self.players = list(state.index)
+        self._rows = {player: i for i, player in enumerate(self.players)}
+        self._totals = state[self.columns].to_numpy(dtype="float64")
+        self.dtypes = meta["dtypes"]
+        self.hashes = {int(season): h for season, h in meta["hashes"].items()}
+        # season partials are only read when a range of seasons needs them
+        self.path = path
+        return self
+
+
+def batting_record(df, path):
+    """The all time batting record of the season rows in df, best run scorers
+    first, with the aggregation state kept in the directory path."""
+    aggregates = SeasonAggregates.load(path, batting_aggregates, batting_components)
+    if aggregates.update(df):
+        try:
+            aggregates.save(path)
+        except OSError:
+            # read only data directory, aggregate again next time
+            pass
+    batting_all_time = (
+        aggregates.totals().reset_index().sort_values(by="Runs", ascending=False)
+    )
+    # the csv files write 0 for a ratio over no dismissals or balls
+    batting_all_time = batting_all_time.fillna(0).round(2)
+    batting_all_time.index = np.arange(0, len(batting_all_time))
+    return batting_all_time
@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from leaderboard import ALL_TEAMS, metric_order
+
+
+def summed_columns(metrics, components, counts=()):
+    """The columns whose sums over seasons the metrics are combined from."""
+    columns = list(counts)
+    columns += [metric.name for metric in metrics if metric.combine == "sum"]
+    for metric in metrics:
+        columns += getattr(metric.combine, "columns", [])
+    columns += list(components)
+    return list(dict.fromkeys(columns))
+
+
+def max_levels(values):
+    """Sparse table of values along the season axis: level k holds the maxima
+    of the 2**k seasons starting at every season."""
+    levels = [values]
+    width = 1
+    while 2 * width <= len(values):
+        previous = levels[-1]
+        levels.append(np.fmax(previous[:-width], previous[width:]))
+        width *= 2
+    return levels
+
+
+class SeasonForm:
+    """Totals of every player over any window of consecutive seasons.
+
+    The season rows are summed into a dense season x player x column array
+    and accumulated over the seasons, a window is the difference of two of
+    its slices. Maxima come from a sparse table, two lookups per window.
+    Either way a window costs O(players) whatever its length.
+    """
+
+    def __init__(
+        self,
+        df,
+        metrics,
+        components=None,
+        counts=(),
+        player_col="PLAYER",
+        season_col="Season",
+        team_col="Team",
+    ):
+        components = components or {}
+        self.metrics = metrics
+        self.player_col = player_col
+        player_codes, self.players = pd.factorize(
+            np.asarray(df[player_col], dtype=object), sort=True
+        )
+        seasons = df[season_col].to_numpy()
+        self.seasons = np.unique(seasons)
+        season_codes = np.searchsorted(self.seasons, seasons)
+        shape = (len(self.seasons), len(self.players))
+
+        # running sums, with the seasons played as the last column
+        self._columns = summed_columns(metrics, components, counts)
+        values = np.empty((len(df), len(self._columns) + 1))
+        for i, col in enumerate(self._columns):
+            source = components[col](df) if col in components else df[col]
+            values[:, i] = np.asarray(source, dtype="float64")
+        values[:, -1] = 1
+        sums = np.zeros(shape + (values.shape[1],))
+        np.add.at(sums, (season_codes, player_codes), values)
+        sums[..., -1] = sums[..., -1] > 0
+        self._cumsum = np.concatenate(
+            [np.zeros((1,) + sums.shape[1:]), np.cumsum(sums, axis=0)]
+        )
+
+        self._max_columns = [m.name for m in metrics if m.combine == "max"]
+        maxima = np.full(shape + (len(self._max_columns),), np.nan)
+        for i, col in enumerate(self._max_columns):
+            np.fmax.at(
+                maxima[..., i],
+                (season_codes, player_codes),
+                df[col].to_numpy(dtype="float64"),
+            )
+        self._max_levels = max_levels(maxima)
+
+        # team of every player in the last season played up to each season
+        team_codes, self.teams = pd.factorize(np.asarray(df[team_col], dtype=object))
+        last_team = np.full(shape, -1)
+        last_team[season_codes, player_codes] = team_codes
+        last_played = np.where(last_team >= 0, np.arange(shape[0])[:, None], -1)
+        last_played = np.maximum.accumulate(last_played, axis=0)
+        self._last_team = np.take_along_axis(
+            last_team, np.maximum(last_played, 0), axis=0
+        )
+
+        # counting columns shown along with the metrics, integers stay integers
+        names = [metric.name for metric in metrics]
+        self.counts = [col for col in counts if col not in names]
+        self._integer = [
+            col
+            for col in self.counts + names
+            if col in self._columns + self._max_columns and df[col].dtype.kind in "iu"
+        ]
+        self.columns = self._frame_columns()
+        self._windows = {}
+
+    def save(self, path):
+        """Write the arrays to the directory path as .npy files."""
+        np.save(os.path.join(path, "cumsum.npy"), self._cumsum)
+        for level, maxima in enumerate(self._max_levels):
+            np.save(os.path.join(path, "max_{}.npy".format(level)), maxima)
+        np.save(os.path.join(path, "last_team.npy"), self._last_team)
+        meta = {
+            "player_col": self.player_col,
+            "players": self.players.tolist(),
+            "teams": self.teams.tolist(),
+            "seasons": self.seasons.tolist(),
+            "columns": self._columns,
+            "max_columns": self._max_columns,
+            "counts": self.counts,
+            "integer": self._integer,
+            "levels": len(self._max_levels),
+        }
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, path, metrics, mmap_mode="r"):
+        """Map the arrays written by save, shared by every process mapping them."""
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        self = cls.__new__(cls)
+        self.metrics = metrics
+        self.player_col = meta["player_col"]
+        self.players = np.array(meta["players"], dtype=object)
+        self.teams = np.array(meta["teams"], dtype=object)
+        self.seasons = np.array(meta["seasons"])
+        self._columns = meta["columns"]
+        self._max_columns = meta["max_columns"]
+        self.counts = meta["counts"]
+        self._integer = meta["integer"]
+        self._cumsum = np.load(os.path.join(path, "cumsum.npy"), mmap_mode=mmap_mode)
+        self._max_levels = [
+            np.load(os.path.join(path, "max_{}.npy".format(level)), mmap_mode=mmap_mode)
+            for level in range(meta["levels"])
+        ]
+        self._last_team = np.load(
+            os.path.join(path, "last_team.npy"), mmap_mode=mmap_mode
+        )
+        self.columns = self._frame_columns()
+        self._windows = {}
+        return self
+
+    def _frame_columns(self):
+        names = [metric.name for metric in self.metrics]
+        return [self.player_col, "Team", "Seasons"] + self.counts + names
+
+    def window(self, first, last):
+        """One row per player who played between seasons first and last."""
+        start = int(np.searchsorted(self.seasons, first, "left"))
+        stop = int(np.searchsorted(self.seasons, last, "right"))
+        frame = self._windows.get((start, stop))
+        if frame is None:
+            frame = self._windows[(start, stop)] = self._build_window(start, stop)
+        return frame
+
+    def _build_window(self, start, stop):
+        if start >= stop:
+            return pd.DataFrame(columns=self.columns)
+        totals = self._cumsum[stop] - self._cumsum[start]
+        keep = totals[:, -1] > 0
+        sums = {col: totals[keep, i] for i, col in enumerate(self._columns)}
+
+        # the max over start..stop - 1 from two overlapping power of 2 spans
+        level = (stop - start).bit_length() - 1
+        maxima = self._max_levels[level]
+        maxima = np.fmax(maxima[start], maxima[stop - 2**level])[keep]
+
+        frame = {
+            self.player_col: self.players[keep],
+            "Team": self.teams[self._last_team[stop - 1][keep]],
+            "Seasons": totals[keep, -1].astype("int64"),
+        }
+        for col in self.counts:
+            frame[col] = sums[col]
+        for metric in self.metrics:
+            if metric.combine == "sum":
+                values = sums[metric.name]
+            elif metric.combine == "max":
+                values = maxima[:, self._max_columns.index(metric.name)]
+            else:
+                values = np.round(metric.combine(sums), 2)
+            frame[metric.name] = values
+        for col in self._integer:
+            frame[col] = frame[col].astype("int64")
+        return pd.DataFrame(frame, columns=self.columns)
+
+    def leaderboard(self, first, last, metric, team=ALL_TEAMS):
+        """The window's rows and the positions of its leaderboard on metric.
+
+        Players whose metric is undefined in the window, a ratio over no
+        balls or dismissals, are left out. A team's leaderboard holds the
+        players whose last season in the window was with the team.
+        """
+        frame = self.window(first, last)
+        spec = next(m for m in self.metrics if m.name == metric)
+        values = frame[metric].to_numpy(dtype="float64")
+        rows = metric_order(values, spec)
+        rows = rows[np.isfinite(values[rows])]
+        if team != ALL_TEAMS:
+            rows = rows[frame["Team"].to_numpy()[rows] == team]
+        return frame, rows
+
+
+def form_key(df, metrics, components, counts=()):
+    """Hash of the rows and metric definitions a SeasonForm is built from."""
+    columns = summed_columns(metrics, components, counts)
+    config = [
+        [metric.name, metric.combine if isinstance(metric.combine, str) else None]
+        for metric in metrics
+    ] + [columns]
+    rows = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    digest = hashlib.sha1(json.dumps(config).encode())
+    digest.update(rows.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def cached_form(df, metrics, components, path, counts=()):
+    """The SeasonForm of df, memory mapped from a directory under path.
+
+    The arrays are written once per version of the rows, worker processes
+    and reloads map the same files instead of each building their own copy.
+    Built in memory when path can't be written.
+    """
+    cube_path = os.path.join(path, form_key(df, metrics, components, counts))
+    try:
+        return SeasonForm.load(cube_path, metrics)
+    except (OSError, ValueError):
+        pass
+    form = SeasonForm(df, metrics, components, counts)
+    tmp_path = None
+    try:
+        os.makedirs(path, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(prefix=".cube-", dir=path)
+        form.save(tmp_path)
+        os.rename(tmp_path, cube_path)
+    except OSError:
+        # read only, or another process renamed its copy in first
+        if tmp_path is not None:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        if not os.path.exists(cube_path):
+            return form
+    # the cubes of older rows, processes still mapping them keep their pages
+    for name in os.listdir(path):
+        if name != os.path.basename(cube_path) and not name.startswith("."):
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+    return SeasonForm.load(cube_path, metrics)
@@ -0,0 +1,175 @@
+import collections
+import datetime
+import json
+import logging
+
+import dash
+import numpy as np
+import pandas as pd
+import plotly
+from dash.dependencies import Output
+from dash.exceptions import PreventUpdate
+from plotly.basedatatypes import BaseFigure
+
+logger = logging.getLogger(__name__)
+
+# the releases whose private internals the fast paths below rely on, any
+# other release keeps Dash's own callback wrapper and Plotly's to_dict
+tested_versions = {"dash": "1.16.", "plotly": "4.9."}
+fast_paths = all(
+    module.__version__.startswith(tested_versions[module.__name__])
+    for module in (dash, plotly)
+)
+if fast_paths:
+    try:
+        from dash import _validate
+        from dash._utils import stringify_id
+        from dash.dash import _NoUpdate
+    except ImportError:
+        fast_paths = False
+
+try:
+    import orjson
+except ImportError:
+    # the standard library encoder works too, only slower
+    orjson = None
+
+
+def _default(obj):
+    """Turn what orjson can't encode natively into plain python values."""
+    if fast_paths and isinstance(obj, BaseFigure):
+        # what to_dict returns, without deep copying the layout template
+        figure = {"data": obj._data, "layout": obj._layout}
+        frames = [frame._props for frame in obj._frame_objs]
+        if frames:
+            figure["frames"] = frames
+        return figure
+    if hasattr(obj, "to_plotly_json"):
+        return obj.to_plotly_json()
+    if isinstance(obj, (np.ndarray, pd.Series, pd.Index, pd.Categorical)):
+        return column_values(obj)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (datetime.date, datetime.datetime)):
+        return obj.isoformat()
+    raise TypeError("Type is not JSON serializable: {}".format(type(obj).__name__))
+
+
+def dumps(obj):
+    """Encode a callback response, figures, numpy arrays and NaN included.
+
+    NaN and infinite floats become null like with Plotly's encoder.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            obj,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        ).decode()
+    return json.dumps(obj, cls=plotly.utils.PlotlyJSONEncoder)
+
+
+def column_values(values, decimals=None):
+    """A column as a list of python values, missing values as None.
+
+    Floats are rounded to decimals places if given.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind == "f":
+        if decimals is not None:
+            values = values.round(decimals)
+        missing = ~np.isfinite(values)
+        if missing.any():
+            values = values.astype(object)
+            values[missing] = None
+    elif values.dtype.kind == "O":
+        values = values.copy()
+        values[pd.isna(values)] = None
+    return values.tolist()
+
+
+def records(df, rows=None, columns=None, decimals=None):
+    """Like df.to_dict("records") for the given rows, built from the columns."""
+    if columns is None:
+        columns = list(df.columns)
+    if rows is None:
+        rows = np.arange(len(df))
+    data = [column_values(df[col].to_numpy()[rows], decimals) for col in columns]
+    return [dict(zip(columns, row)) for row in zip(*data)]
+
+
+def serialize_callbacks(app):
+    """Encode the responses of every registered callback with dumps.
+
+    Replaces the function Dash wraps each callback in with one that does the
+    same checks but skips Plotly's encoder, which encodes every response,
+    parses it back and encodes it again. Call this once, after all the
+    callbacks have been registered and before they are cached or timed.
+
+    Leaves the callbacks as they are with Dash or Plotly releases other than
+    tested_versions, as the wrapper uses their private internals.
+    """
+    if not fast_paths:
+        logger.warning(
+            "dash %s and plotly %s are not the tested releases, "
+            "callback responses are encoded by dash",
+            dash.__version__,
+            plotly.__version__,
+        )
+        return
+    for callback_id, callback in app.callback_map.items():
+        if "callback" in callback:
+            # the callback function itself, as wrapped by functools.wraps
+            func = callback["callback"].__wrapped__
+            callback["callback"] = _serialized(callback_id, func)
+
+
+def callback_outputs(callback_id):
+    """The Output, or list of Outputs, a callback was registered with."""
+    outputs = []
+    for output in callback_id.strip(".").split("..."):
+        component_id, prop = output.rsplit(".", 1)
+        # pattern matching ids are stringified dicts
+        if component_id.startswith("{"):
+            component_id = json.loads(component_id)
+        outputs.append(Output(component_id, prop))
+    return outputs if callback_id.startswith("..") else outputs[0]
+
+
+def _serialized(callback_id, func):
+    multi = callback_id.startswith("..")
+    output = callback_outputs(callback_id)
+
+    def add_context(*args, outputs_list=None):
+        output_value = func(*args)
+        if isinstance(output_value, _NoUpdate):
+            raise PreventUpdate
+
+        # wrap single outputs so they are handled like multi outputs
+        output_spec = outputs_list
+        if not multi:
+            output_value, output_spec = [output_value], [output_spec]
+        _validate.validate_multi_return(output_spec, output_value, callback_id)
+
+        component_ids = collections.defaultdict(dict)
+        for value, spec in zip(output_value, output_spec):
+            if isinstance(value, _NoUpdate):
+                continue
+            # pattern matching outputs come as lists of values and specs
+            for value_i, spec_i in (
+                zip(value, spec) if isinstance(spec, list) else [[value, spec]]
+            ):
+                if not isinstance(value_i, _NoUpdate):
+                    id_str = stringify_id(spec_i["id"])
+                    component_ids[id_str][spec_i["property"]] = value_i
+        if not component_ids:
+            raise PreventUpdate
+
+        try:
+            return dumps({"response": component_ids, "multi": True})
+        except TypeError:
+            _validate.fail_callback_output(output_value, output)
+
+    add_context.__name__ = getattr(func, "__name__", "add_context")
+    add_context.__wrapped__ = func
+    return add_context
@@ -0,0 +1,255 @@
+"""Pre-render every callback output of ipl-app.py to static JSON files.
+
+    python static_export.py --output static_export --jobs 4
+
+Every callback is evaluated for every combination of its dropdown values,
+and for every page of the records tables, in parallel. The responses are
+written to <output>/<callback>/<key>.json with a manifest.json mapping the
+callback inputs to the files. Start the app with STATIC_EXPORT_DIR=<output>
+to answer callbacks from the files, anything not exported is still computed.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+manifest_name = "manifest.json"
+
+# set in the parent before the worker processes are forked
+app = None
+
+# responses of the export being served, by callback
+served_responses = []
+
+
+def export_key(args):
+    """The json of the callback input values, used to look responses up."""
+    return json.dumps(args, sort_keys=True, default=str)
+
+
+def callback_directory(callback_id):
+    return re.sub(r"[^\w-]+", "_", callback_id).strip("_")
+
+
+def response_filename(key):
+    return hashlib.sha1(key.encode()).hexdigest()[:16] + ".json"
+
+
+def write_response(out_dir, callback_id, args):
+    """Evaluate one callback and write its response, returns the manifest entry."""
+    from dash.exceptions import PreventUpdate
+    from input_space import call_callback
+
+    try:
+        response = call_callback(app, callback_id, args)
+    except PreventUpdate:
+        return None
+    key = export_key(args)
+    filename = response_filename(key)
+    path = os.path.join(out_dir, callback_directory(callback_id), filename)
+    with open(path, "w") as f:
+        f.write(response)
+    return key, filename, response
+
+
+def export_task(task):
+    out_dir, callback_id, args, page_index = task
+    result = write_response(out_dir, callback_id, args)
+    if result is None:
+        return callback_id, []
+    entries = [result[:2]]
+    if page_index is not None:
+        # export every other page of the table as well
+        response = json.loads(result[2])["response"]
+        page_count = next(
+            values["page_count"]
+            for values in response.values()
+            if "page_count" in values
+        )
+        for page in range(1, page_count):
+            page_args = list(args)
+            page_args[page_index] = page
+            page_result = write_response(out_dir, callback_id, page_args)
+            if page_result is not None:
+                entries.append(page_result[:2])
+    return callback_id, entries
+
+
+def check_output(out_dir):
+    """Raise ValueError unless out_dir is missing, empty or an earlier export."""
+    if not os.path.exists(out_dir):
+        return
+    if not os.path.isdir(out_dir) or (
+        os.listdir(out_dir) and not os.path.exists(os.path.join(out_dir, manifest_name))
+    ):
+        raise ValueError(
+            "{} exists and is not an earlier export, not replacing it".format(out_dir)
+        )
+
+
+def export(module, out_dir, jobs=None, samples=5):
+    """Write the responses of every callback of the app and their manifest.
+
+    The export is written to a temporary directory and swapped in place of
+    out_dir, which may only hold an earlier export.
+    """
+    check_output(out_dir)
+    parent = os.path.dirname(os.path.abspath(out_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(prefix=".export-", dir=parent)
+    try:
+        manifest = _export(module, tmp_path, jobs, samples)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    # swap the new export in place of the old one
+    old_path = None
+    try:
+        if os.path.exists(out_dir):
+            old_path = tempfile.mkdtemp(prefix=".export-old-", dir=parent)
+            os.rename(out_dir, os.path.join(old_path, "export"))
+        os.rename(tmp_path, out_dir)
+    finally:
+        if old_path is not None:
+            shutil.rmtree(old_path, ignore_errors=True)
+    return manifest
+
+
+def _export(module, out_dir, jobs, samples):
+    global app
+    from data_store import source_signature
+    from input_space import input_combinations, layout_components, player_choices
+
+    app = module.app
+    components = layout_components(app)
+    choices = player_choices(module)
+
+    manifest = {"sources": source_signature(), "callbacks": {}}
+    tasks = []
+    for callback_id, callback in app.callback_map.items():
+        if "callback" not in callback:
+            continue
+        os.makedirs(os.path.join(out_dir, callback_directory(callback_id)))
+        inputs = ["{}.{}".format(d["id"], d["property"]) for d in callback["inputs"]]
+        manifest["callbacks"][callback_id] = {
+            "inputs": inputs,
+            "directory": callback_directory(callback_id),
+            "responses": {},
+        }
+        page_index = next(
+            (
+                i
+                for i, d in enumerate(callback["inputs"])
+                if d["property"] == "page_current"
+            ),
+            None,
+        )
+        for args in input_combinations(app, callback_id, components, samples, choices):
+            tasks.append((out_dir, callback_id, args, page_index))
+
+    # fork so the workers share the app that is already loaded
+    context = multiprocessing.get_context("fork")
+    with context.Pool(jobs) as pool:
+        for callback_id, entries in pool.imap_unordered(export_task, tasks, 16):
+            responses = manifest["callbacks"][callback_id]["responses"]
+            for key, filename in entries:
+                responses[key] = filename
+
+    with open(os.path.join(out_dir, manifest_name), "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
+
+
+def serve_exported(app, export_dir):
+    """Answer the app's callbacks from an export, computing only the misses.
+
+    Call this once, after all the callbacks have been registered. An export
+    built from other data files than the current ones is ignored.
+    """
+    from data_store import source_signature
+
+    try:
+        with open(os.path.join(export_dir, manifest_name)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("static export not used: %s", e)
+        return False
+    if manifest["sources"] != source_signature():
+        logger.warning("static export not used: it was built from other data files")
+        return False
+
+    for callback_id, exported in manifest["callbacks"].items():
+        callback = app.callback_map.get(callback_id)
+        if callback is not None and "callback" in callback:
+            directory = os.path.join(export_dir, exported["directory"])
+            served_responses.append(exported["responses"])
+            callback["callback"] = _exported(
+                callback["callback"], directory, exported["responses"]
+            )
+    return True
+
+
+def forget_exported():
+    """Stop answering from the export, after the data was reloaded."""
+    for responses in served_responses:
+        responses.clear()
+
+
+def _exported(func, directory, responses):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        filename = responses.get(export_key(list(args)))
+        if filename is None:
+            return func(*args, **kwargs)
+        with open(os.path.join(directory, filename)) as f:
+            return f.read()
+
+    return wrapper
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="static_export", help="export directory")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes")
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=5,
+        help="random player selections and season ranges",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    # compute every response, without the cache or an older export
+    os.environ["CALLBACK_CACHE_SIZE"] = "0"
+    os.environ.pop("STATIC_EXPORT_DIR", None)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from input_space import load_app
+
+    try:
+        check_output(args.output)
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    manifest = export(load_app(), args.output, args.jobs, args.samples)
+    count = sum(len(c["responses"]) for c in manifest["callbacks"].values())
+    logger.info(
+        "exported %d responses of %d callbacks to %s in %.1fs",
+        count,
+        len(manifest["callbacks"]),
+        args.output,
+        time.perf_counter() - start,
+    )
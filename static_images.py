@@ -0,0 +1,54 @@
+import os
+
+import flask
+
+image_dir = os.path.join(os.getcwd(), "images")
+
+# the urls carry a version, so browsers can keep the files for a year
+cache_max_age = 365 * 24 * 60 * 60
+
+
+def image_url(filename, image_dir=image_dir):
+    """Return the url of an image, versioned by its modification time."""
+    mtime = int(os.path.getmtime(os.path.join(image_dir, filename)))
+    return "/images/{}?v={}".format(filename, mtime)
+
+
+def send_image(filename, image_dir=image_dir):
+    """Send an image with ETag, Last-Modified and long lived Cache-Control headers.
+
+    When a precompressed WebP variant exists next to the PNG and the browser
+    accepts WebP, the variant is sent instead.
+    """
+    webp_name = os.path.splitext(filename)[0] + ".webp"
+    accepts_webp = "image/webp" in flask.request.headers.get("Accept", "")
+    if accepts_webp and os.path.isfile(os.path.join(image_dir, webp_name)):
+        filename = webp_name
+    response = flask.send_from_directory(image_dir, filename)
+
+    # set the validators explicitly, flask versions differ in what they add
+    stat = os.stat(os.path.join(image_dir, filename))
+    response.set_etag("{}-{}".format(int(stat.st_mtime), stat.st_size))
+    response.last_modified = int(stat.st_mtime)
+    response.cache_control.no_cache = None
+    response.cache_control.public = True
+    response.cache_control.max_age = cache_max_age
+    response.vary.add("Accept")
+    return response.make_conditional(flask.request)
+
+
+def build_webp_images(image_dir=image_dir, quality=90):
+    """Write a WebP copy of every PNG in image_dir, requires Pillow."""
+    from PIL import Image
+
+    for filename in sorted(os.listdir(image_dir)):
+        if not filename.endswith(".png"):
+            continue
+        webp_path = os.path.join(image_dir, os.path.splitext(filename)[0] + ".webp")
+        with Image.open(os.path.join(image_dir, filename)) as image:
+            image.save(webp_path, "WEBP", quality=quality, method=6)
+        print("wrote", webp_path)
+
+
+if __name__ == "__main__":
+    build_webp_images()
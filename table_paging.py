@@ -0,0 +1,251 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from serialization import records
+
+# one "{column} operator value" part of a DataTable filter_query
+filter_part_regex = re.compile(
+    r"^\{(?P<column>[^}]+)\}\s+(?P<operator>\S+)(\s+(?P<value>.*))?$"
+)
+
+# DataTable operators and the symbols it also accepts for them
+filter_operators = {
+    "eq": "eq",
+    "=": "eq",
+    "ne": "ne",
+    "!=": "ne",
+    "lt": "lt",
+    "<": "lt",
+    "le": "le",
+    "<=": "le",
+    "gt": "gt",
+    ">": "gt",
+    "ge": "ge",
+    ">=": "ge",
+    "contains": "contains",
+    "datestartswith": "datestartswith",
+}
+
+
+def parse_filter_value(value):
+    """Strip the quotes around a filter value and convert numbers."""
+    value = value.strip()
+    if len(value) > 1 and value[0] == value[-1] and value[0] in "\"'`":
+        return value[1:-1]
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def filter_tokens(filter_query):
+    """Split a filter_query into "(", ")", "&&", "||" and the comparisons
+    between them, ignoring anything inside quotes or column braces."""
+    tokens = []
+    part = ""
+    closing = None
+    i = 0
+    while i < len(filter_query):
+        char = filter_query[i]
+        if closing is not None:
+            closing = None if char == closing else closing
+        elif char in "\"'`":
+            closing = char
+        elif char == "{":
+            closing = "}"
+        elif char in "()" or filter_query[i : i + 2] in ("&&", "||"):
+            token = char if char in "()" else filter_query[i : i + 2]
+            tokens += [part.strip(), token] if part.strip() else [token]
+            part = ""
+            i += len(token)
+            continue
+        part += char
+        i += 1
+    if closing is not None:
+        raise ValueError("unterminated {} in filter query".format(closing))
+    return tokens + [part.strip()] if part.strip() else tokens
+
+
+def parse_comparison(part):
+    """(column, operator, value, case_sensitive) of one comparison, None for
+    the ones this parser doesn't evaluate, like "is blank"."""
+    match = filter_part_regex.match(part)
+    if match is None or match.group("value") is None:
+        return None
+    operator = match.group("operator")
+    case_sensitive = True
+    # "s" and "i" prefixes select case sensitive or insensitive matching
+    if operator[0] in "si" and operator[1:] in filter_operators:
+        case_sensitive = operator[0] == "s"
+        operator = operator[1:]
+    if operator not in filter_operators:
+        return None
+    return (
+        match.group("column"),
+        filter_operators[operator],
+        parse_filter_value(match.group("value")),
+        case_sensitive,
+    )
+
+
+def parse_filter_query(filter_query):
+    """Parse a DataTable filter_query into the comparisons it ors and ands.
+
+    Returns a list of alternatives, a row matches when every comparison of
+    one of them matches. && binds tighter than ||, parentheses group.
+    Comparisons this parser doesn't evaluate always match. Raises ValueError
+    for a malformed query.
+    """
+    tokens = filter_tokens(filter_query or "")
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def alternatives():
+        # alternatives of the || separated terms, each in disjunctive form
+        nonlocal position
+        result = term()
+        while peek() == "||":
+            position += 1
+            result = result + term()
+        return result
+
+    def term():
+        # every combination of one alternative of each && separated factor
+        nonlocal position
+        result = factor()
+        while peek() == "&&":
+            position += 1
+            right = factor()
+            result = [first + second for first in result for second in right]
+        return result
+
+    def factor():
+        nonlocal position
+        token = peek()
+        if token == "(":
+            position += 1
+            result = alternatives()
+            if peek() != ")":
+                raise ValueError("unbalanced parentheses in filter query")
+            position += 1
+            return result
+        if token is None or token in (")", "&&", "||"):
+            raise ValueError("missing comparison in filter query")
+        position += 1
+        comparison = parse_comparison(token)
+        return [[comparison] if comparison is not None else []]
+
+    if not tokens:
+        return [[]]
+    result = alternatives()
+    if position != len(tokens):
+        raise ValueError("unbalanced parentheses in filter query")
+    return result
+
+
+def comparison_mask(df, rows, column, operator, value, case_sensitive):
+    """Evaluate one comparison on the given rows of df."""
+    values = df[column].to_numpy()[rows]
+    numeric = pd.api.types.is_numeric_dtype(df[column].dtype)
+
+    if numeric and operator not in ("contains", "datestartswith"):
+        # a quoted number compares as a number, like the browser does, other
+        # strings never compare
+        if not isinstance(value, float):
+            try:
+                value = float(value)
+            except ValueError:
+                value = np.nan
+        values = values.astype("float64")
+    else:
+        values = pd.Series(values).astype(str)
+        value = str(value) if not isinstance(value, float) else "{:g}".format(value)
+        if not case_sensitive:
+            values = values.str.lower()
+            value = value.lower()
+        if operator == "contains":
+            return values.str.contains(value, regex=False).to_numpy()
+        if operator == "datestartswith":
+            return values.str.startswith(value).to_numpy()
+        values = values.to_numpy()
+
+    if operator == "eq":
+        return values == value
+    if operator == "ne":
+        return values != value
+    if operator == "lt":
+        return values < value
+    if operator == "le":
+        return values <= value
+    if operator == "gt":
+        return values > value
+    return values >= value
+
+
+def filter_mask(df, rows, filter_query):
+    """Evaluate a filter_query on the given rows of df, returns a boolean mask.
+
+    Comparisons of columns df doesn't have always match, a malformed query
+    filters nothing like in the browser.
+    """
+    try:
+        alternatives = parse_filter_query(filter_query)
+    except ValueError:
+        return np.ones(len(rows), dtype=bool)
+    mask = np.zeros(len(rows), dtype=bool)
+    for comparisons in alternatives:
+        matches = np.ones(len(rows), dtype=bool)
+        for column, operator, value, case_sensitive in comparisons:
+            if column in df.columns:
+                matches &= comparison_mask(
+                    df, rows, column, operator, value, case_sensitive
+                )
+        mask |= matches
+    return mask
+
+
+def sort_positions(df, rows, sort_by):
+    """Return the order that sorts the given rows of df by the table's sort_by."""
+    columns = [col["column_id"] for col in sort_by if col["column_id"] in df.columns]
+    if not columns:
+        return np.arange(len(rows))
+    ascending = [
+        col["direction"] == "asc" for col in sort_by if col["column_id"] in df.columns
+    ]
+    keys = df[columns].iloc[rows].reset_index(drop=True)
+    return keys.sort_values(
+        by=columns, ascending=ascending, kind="mergesort"
+    ).index.to_numpy()
+
+
+def page_records(
+    df,
+    rows,
+    page_current,
+    page_size,
+    sort_by=None,
+    filter_query="",
+    columns=None,
+    decimals=None,
+):
+    """Filter, sort and page the presorted rows of df on the server.
+
+    rows are the positions of df in the default leaderboard order. Only the
+    records of the visible page are built, restricted to columns if given
+    and with floats rounded to decimals places.
+    Returns the page records and the number of pages.
+    """
+    rows = np.asarray(rows)
+    if filter_query:
+        rows = rows[filter_mask(df, rows, filter_query)]
+    if sort_by:
+        rows = rows[sort_positions(df, rows, sort_by)]
+
+    page_count = max(1, -(-len(rows) // page_size))
+    start = page_current * page_size
+    page = records(df, rows[start : start + page_size], columns, decimals)
+    return page, page_count
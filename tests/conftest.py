@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# the app modules live at the top of the repo
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root_dir)
+data_dir = os.path.join(root_dir, "data")
+
+
+@pytest.fixture(scope="session")
+def batting():
+    return pd.read_csv(os.path.join(data_dir, "batting.csv"))
+
+
+@pytest.fixture(scope="session")
+def bowling():
+    return pd.read_csv(os.path.join(data_dir, "bowling.csv")).rename(
+        columns={"Maid": "Maiden"}
+    )
+
+
+@pytest.fixture(scope="session")
+def tables():
+    """The cleaned season tables, as the app reads them."""
+    from data_store import clean_tables
+
+    return clean_tables(data_dir, names=["batting", "bowling"])
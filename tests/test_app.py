@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from input_space import call_callback, load_app
+from metric_registry import leaderboard_views
+
+
+@pytest.fixture(scope="module")
+def app_module():
+    return load_app()
+
+
+def all_time_rows(module, view, metric, team, seasons):
+    """Every row of the all time table, one page holding them all."""
+    suffix = leaderboard_views[view]["suffix"]
+    table = "all-time-records" + suffix
+    callback_id = "..all-time-graph{0}.figure...{1}.data...{1}.page_count..".format(
+        suffix, table
+    )
+    args = [metric, team, seasons, 0, 10000, [], ""]
+    response = json.loads(call_callback(module.app, callback_id, args))
+    return {row["PLAYER"]: row for row in response["response"][table]["data"]}
+
+
+@pytest.mark.parametrize(
+    "view, metric", [("batting", "Runs"), ("batting", "SR"), ("bowling", "Wkts")]
+)
+@pytest.mark.parametrize("team", ["All Teams", "Mumbai Indians"])
+def test_adjacent_season_ranges_agree(app_module, view, metric, team):
+    df = app_module.app_data[leaderboard_views[view]["season"]]
+    in_2019 = set(df.loc[df["Season"] == 2019, "PLAYER"].astype(str))
+    every_season = all_time_rows(app_module, view, metric, team, [2008, 2019])
+    before_2019 = all_time_rows(app_module, view, metric, team, [2008, 2018])
+    # the same source and team rule on both sides of the last slider step:
+    # players who didn't play the extra season keep their row and team
+    for rows, others in [(every_season, before_2019), (before_2019, every_season)]:
+        for player, row in rows.items():
+            if player not in in_2019:
+                assert others.get(player) == row
+    assert len(every_season) and len(before_2019)
+    # the columns don't depend on the range
+    assert {tuple(row) for row in every_season.values()} == {
+        tuple(row) for row in before_2019.values()
+    }
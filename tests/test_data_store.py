@@ -0,0 +1,62 @@
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_store import (
+    build_store,
+    clean_tables,
+    file_path as data_dir,
+    load_data,
+    source_files,
+    store_is_fresh,
+)
+
+
+def test_one_process_builds_the_store(tmp_path):
+    file_path = str(tmp_path)
+    for filename in source_files:
+        shutil.copy(os.path.join(data_dir, filename), file_path)
+    store_path = os.path.join(file_path, "store")
+    builds = []
+
+    def build():
+        builds.append(1)
+        # long enough for the other watchers to find the store stale
+        time.sleep(0.5)
+        return {"points": pd.DataFrame({"Team": ["CSK", "MI"], "Pts": [18, 16]})}
+
+    results = []
+
+    def watcher():
+        results.append(build_store(build, store_path, file_path))
+
+    threads = [threading.Thread(target=watcher) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert store_is_fresh(store_path, file_path)
+    for tables in results:
+        assert list(tables["points"]["Pts"]) == [18, 16]
+
+
+def test_published_career_figures_are_kept():
+    tables = clean_tables(names=["batting_agg", "bowling_agg"])
+    batting = load_data("batting_all_time.csv")
+    bowling = load_data("bowling_all_time.csv").set_index("PLAYER")
+    bowling_agg = tables["bowling_agg"]
+    published = bowling.loc[bowling_agg["PLAYER"].astype(str)]
+    for col in ["Ov", "Econ", "Avg", "SR"]:
+        np.testing.assert_array_equal(bowling_agg[col], published[col], err_msg=col)
+    # batting Avg and SR come from the career sums
+    outs = batting["Inns"] - batting["NO"]
+    np.testing.assert_allclose(
+        tables["batting_agg"]["Avg"],
+        (batting["Runs"] / outs.where(outs > 0)).round(2).fillna(0),
+    )
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from distributions import ValueCounts, nice_width, quantile
+from leaderboard import ALL_TEAMS
+
+
+def plotly_interp(values, q):
+    """plotly.js' linear quartile rule, Lib.interp over the sorted values."""
+    n = q * len(values) - 0.5
+    if n < 0:
+        return values[0]
+    if n > len(values) - 1:
+        return values[-1]
+    frac = n % 1
+    return frac * values[int(np.ceil(n))] + (1 - frac) * values[int(np.floor(n))]
+
+
+def rows(df, first, last, team=ALL_TEAMS):
+    keep = df["Season"].between(first, last)
+    if team != ALL_TEAMS:
+        keep &= df["Team"] == team
+    return df.loc[keep]
+
+
+@pytest.mark.parametrize("column", ["Runs", "Avg", "SR"])
+def test_histogram_matches_numpy(tables, column):
+    df = tables["batting"]
+    counts = ValueCounts(df, column)
+    values = df[column].dropna()
+    assert counts.edges[0] <= values.min() and values.max() < counts.edges[-1]
+    for first, last, team in [
+        (2008, 2019, ALL_TEAMS),
+        (2019, 2019, ALL_TEAMS),
+        (2010, 2015, "Chennai Super Kings"),
+    ]:
+        window = rows(df, first, last, team)[column].dropna()
+        expected, _ = np.histogram(window, bins=counts.edges)
+        np.testing.assert_array_equal(counts.histogram(first, last, team), expected)
+
+
+def test_integer_bins_never_split_a_value():
+    df = pd.DataFrame({"Season": 2019, "Team": "MI", "Wkts": [0, 1, 1, 3]})
+    counts = ValueCounts(df, "Wkts", nbins=50)
+    assert counts.width == 1
+    np.testing.assert_array_equal(counts.edges, [-0.5, 0.5, 1.5, 2.5, 3.5])
+    np.testing.assert_array_equal(counts.histogram(2019, 2019), [1, 2, 0, 1])
+
+
+def test_nice_width():
+    assert nice_width(973, 50) == 20
+    assert nice_width(0.9, 10) == 0.1
+    assert nice_width(3, 50, integer=True) == 1
+
+
+@pytest.mark.parametrize("q", [0, 0.1, 0.25, 0.5, 0.75, 0.99, 1])
+def test_quantile_matches_plotly(q):
+    rng = np.random.default_rng(0)
+    for size in [1, 2, 3, 4, 7, 100]:
+        data = np.sort(rng.integers(0, 10, size).astype("float64"))
+        values, repeats = np.unique(data, return_counts=True)
+        assert quantile(values, np.cumsum(repeats), q) == pytest.approx(
+            plotly_interp(data, q)
+        )
+
+
+def test_box_stats_match_plotly(tables):
+    df = tables["bowling"]
+    counts = ValueCounts(df, "Wkts")
+    stats = counts.box_stats(2014, 2019).set_index("Team")
+    window = rows(df, 2014, 2019)
+    assert set(stats.index) == set(window["Team"].astype(str))
+    for team, team_rows in window.groupby(window["Team"].astype(str)):
+        data = np.sort(team_rows["Wkts"].to_numpy(dtype="float64"))
+        q1, median, q3 = [plotly_interp(data, q) for q in (0.25, 0.5, 0.75)]
+        box = stats.loc[team]
+        assert (box["q1"], box["median"], box["q3"]) == pytest.approx((q1, median, q3))
+        # plotly's fences: the furthest points within 1.5 IQR, outliers beyond
+        low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        inside = data[(data >= low) & (data <= high)]
+        assert box["lowerfence"] == min(q1, inside.min())
+        assert box["upperfence"] == max(q3, inside.max())
+        np.testing.assert_array_equal(
+            box["outliers"], np.unique(data[(data < low) | (data > high)])
+        )
+
+
+def test_box_stats_of_some_teams(tables):
+    counts = ValueCounts(tables["bowling"], "Wkts")
+    teams = ["Mumbai Indians", "Kochi Tuskers Kerala"]
+    # Kochi only played in 2011
+    stats = counts.box_stats(2014, 2019, teams)
+    assert list(stats["Team"]) == ["Mumbai Indians"]
@@ -0,0 +1,38 @@
+import dash_core_components as dcc
+
+from input_space import input_values
+
+
+def test_slider_gives_every_mark():
+    slider = dcc.Slider(
+        id="bandwidth", min=0.25, max=2, step=0.25, marks={0.5: "", 1: "", 2: ""}
+    )
+    slider.value = 1
+    assert input_values(slider, "value") == [0.5, 1, 2]
+    slider.marks = None
+    assert input_values(slider, "value") == [0.25, 0.5, 0.75, 1, 1.25, 1.5, 1.75, 2]
+
+
+def test_range_slider_samples_ranges():
+    years = list(range(2008, 2020))
+    slider = dcc.RangeSlider(
+        id="seasons", min=2008, max=2019, step=1, marks={year: "" for year in years}
+    )
+    slider.value = [2008, 2019]
+    ranges = input_values(slider, "value", samples=10)
+    assert ranges[0] == [2008, 2019] and len(ranges) > 5
+    for first, last in ranges:
+        assert first in years and last in years and first <= last
+    assert ranges == input_values(slider, "value", samples=10)
+
+
+def test_multi_dropdown_samples_choices():
+    players = ["Player {}".format(i) for i in range(500)]
+    dropdown = dcc.Dropdown(
+        id="players", options=[{"label": "Player 0", "value": "Player 0"}], multi=True
+    )
+    dropdown.value = ["Player 0"]
+    selections = input_values(dropdown, "value", samples=20, choices=players)
+    assert selections[0] == ["Player 0"]
+    sampled = {player for selection in selections[1:] for player in selection}
+    assert sampled <= set(players) and len(sampled) > 20
@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from distributions import ValueCounts
+from kde import cached_densities, team_densities
+
+stats = pytest.importorskip("scipy.stats")
+
+teams = ["Chennai Super Kings", "Mumbai Indians", "Kochi Tuskers Kerala"]
+
+
+@pytest.mark.parametrize("first, last, bw_adjust", [(2008, 2019, 1), (2011, 2011, 0.5)])
+def test_densities_match_scipy(tables, first, last, bw_adjust):
+    df = tables["batting"]
+    grid, kept, densities = team_densities(
+        ValueCounts(df, "Runs"), first, last, teams, bw_adjust
+    )
+    window = df[df["Season"].between(first, last)]
+    # teams with fewer than 2 rows have no density
+    assert set(kept) == {team for team in teams if (window["Team"] == team).sum() >= 2}
+    for team, density in zip(kept, densities):
+        runs = window.loc[window["Team"] == team, "Runs"].to_numpy(dtype="float64")
+        # scipy's bandwidth factor is Scott's n ** -1/5
+        kde = stats.gaussian_kde(runs, bw_method=bw_adjust * len(runs) ** -0.2)
+        np.testing.assert_allclose(density, kde(grid), rtol=1e-9, atol=1e-12)
+
+
+def test_single_row_has_no_density():
+    df = pd.DataFrame({"Season": [2019], "Team": ["MI"], "Runs": [10]})
+    grid, kept, densities = team_densities(ValueCounts(df, "Runs"), 2019, 2019, ["MI"])
+    assert kept == [] and densities.shape == (0, 0)
+
+
+def test_cached_densities(tables, tmp_path):
+    path = str(tmp_path)
+    counts = ValueCounts(tables["batting"], "Runs")
+    computed = team_densities(counts, 2010, 2015, teams, 1)
+    for _ in range(2):
+        grid, kept, densities = cached_densities(counts, 2010, 2015, teams, 1, path)
+        np.testing.assert_array_equal(grid, computed[0])
+        assert kept == computed[1]
+        np.testing.assert_array_equal(densities, computed[2])
+    assert len(os.listdir(path)) == 1
+    cached_densities(counts, 2010, 2015, teams, 2, path)
+    assert len(os.listdir(path)) == 2
+
+    # curves of older counts are removed
+    newer = ValueCounts(tables["batting"][lambda df: df["Season"] > 2008], "Runs")
+    cached_densities(newer, 2010, 2015, teams, 1, path)
+    assert len(os.listdir(path)) == 1
@@ -0,0 +1,116 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_store import bowling_aggregates
+from season_aggregates import (
+    SeasonAggregates,
+    batting_aggregates,
+    batting_components,
+    batting_record,
+)
+
+
+def fresh_totals(df, aggregates=batting_aggregates, components=batting_components):
+    fresh = SeasonAggregates(aggregates, components)
+    fresh.update(df)
+    return fresh.totals()
+
+
+def test_record_matches_groupby(batting, tmp_path):
+    record = batting_record(batting, str(tmp_path)).set_index("PLAYER").sort_index()
+    grouped = batting.groupby("PLAYER")
+    for col in ["Mat", "Inns", "NO", "Runs", "BF", "100", "50", "4s", "6s"]:
+        assert (record[col] == grouped[col].sum()).all()
+    assert (record["HS"] == grouped["HS"].max()).all()
+    outs = record["Inns"] - record["NO"]
+    avg = (record["Runs"] / outs.where(outs > 0)).round(2).fillna(0)
+    np.testing.assert_allclose(record["Avg"], avg)
+    np.testing.assert_allclose(
+        record["SR"], (100 * record["Runs"] / record["BF"]).round(2)
+    )
+
+
+def test_removed_season_matches_fresh_build(batting, tmp_path):
+    path = str(tmp_path / "batting")
+    batting_record(batting, path)
+    without_2008 = batting[batting["Season"] != 2008]
+    record = batting_record(without_2008, path)
+    fresh = batting_record(without_2008, str(tmp_path / "fresh"))
+    pd.testing.assert_frame_equal(record, fresh)
+
+    # the season is gone from the saved state too
+    with open(os.path.join(path, "seasons.json")) as f:
+        assert "2008" not in json.load(f)["hashes"]
+    assert not os.path.exists(os.path.join(path, "season_2008.csv"))
+    loaded = SeasonAggregates.load(path, batting_aggregates, batting_components)
+    assert loaded.update(without_2008) == []
+    pd.testing.assert_frame_equal(loaded.totals(), fresh_totals(without_2008))
+
+
+def test_replaced_season_matches_fresh_build(batting, tmp_path):
+    path = str(tmp_path / "batting")
+    batting_record(batting, path)
+    changed = batting.copy()
+    latest = changed["Season"] == 2019
+    changed.loc[latest, "Runs"] += 1
+    # the highest score of a player drops, the old maximum must not stick
+    changed.loc[latest & (changed["PLAYER"] == "Andre Russell"), "HS"] = 1
+    aggregates = SeasonAggregates.load(path, batting_aggregates, batting_components)
+    assert aggregates.update(changed) == [2019]
+    pd.testing.assert_frame_equal(aggregates.totals(), fresh_totals(changed))
+
+
+def test_readded_player_starts_over(batting):
+    aggregates = SeasonAggregates(batting_aggregates, batting_components)
+    aggregates.update(batting)
+    only_2019 = batting[batting["Season"] == 2019]
+    aggregates.update(batting[batting["Season"] != 2019])
+    aggregates.update(only_2019)
+    pd.testing.assert_frame_equal(aggregates.totals(), fresh_totals(only_2019))
+
+
+def test_bowling_totals_after_removed_season(bowling, tmp_path):
+    path = str(tmp_path / "bowling")
+    aggregates = SeasonAggregates(bowling_aggregates)
+    aggregates.update(bowling)
+    aggregates.save(path)
+    aggregates = SeasonAggregates.load(path, bowling_aggregates)
+    earlier = bowling[bowling["Season"] < 2019]
+    assert aggregates.update(earlier) == [2019]
+    totals = aggregates.totals()
+    pd.testing.assert_frame_equal(totals, fresh_totals(earlier, bowling_aggregates, {}))
+    grouped = earlier.groupby("PLAYER")[["Dots", "Maiden"]].sum()
+    pd.testing.assert_frame_equal(totals, grouped, check_dtype=False)
+
+
+def test_merge_matches_fresh_build(batting):
+    early = SeasonAggregates(batting_aggregates, batting_components)
+    early.update(batting[batting["Season"] < 2014])
+    late = SeasonAggregates(batting_aggregates, batting_components)
+    late.update(batting[batting["Season"] >= 2014])
+    early.merge(late)
+    pd.testing.assert_frame_equal(early.totals(), fresh_totals(batting))
+
+
+def test_season_range_matches_groupby(batting):
+    aggregates = SeasonAggregates(batting_aggregates, batting_components)
+    aggregates.update(batting)
+    window = batting[batting["Season"].between(2011, 2014)]
+    pd.testing.assert_frame_equal(
+        aggregates.season_range(2011, 2014), fresh_totals(window)
+    )
+
+
+def test_save_swaps_the_directory(batting, tmp_path):
+    path = str(tmp_path / "batting")
+    batting_record(batting[batting["Season"] < 2019], path)
+    batting_record(batting, path)
+    # no temporary or old directories are left next to the state
+    assert os.listdir(str(tmp_path)) == ["batting"]
+    assert sorted(os.listdir(path)) == sorted(
+        ["totals.csv", "seasons.json"]
+        + ["season_{}.csv".format(season) for season in range(2008, 2020)]
+    )
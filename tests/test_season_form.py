@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from metric_registry import leaderboard_views
+from season_form import SeasonForm, cached_form
+
+# single seasons, the whole range and windows of every other length
+windows = [(2008, 2008), (2019, 2019), (2008, 2019), (2011, 2013), (2014, 2019)]
+windows += [(2010, 2010 + length) for length in range(1, 9)]
+
+
+def groupby_window(df, spec, first, last):
+    """The window the slow way, a groupby over the rows of its seasons."""
+    rows = df[df["Season"].between(first, last)].copy()
+    for col, component in spec["components"].items():
+        rows[col] = component(rows)
+    grouped = rows.groupby(rows["PLAYER"].astype(object))
+    # float sums, 100 * Runs overflows the uint16 columns
+    sums = grouped.sum(numeric_only=True).astype("float64")
+    expected = pd.DataFrame(index=sums.index)
+    # the team of the last season played in the window
+    latest = rows.sort_values("Season", kind="stable")
+    expected["Team"] = latest.groupby(latest["PLAYER"].astype(object))["Team"].last()
+    expected["Seasons"] = grouped["Season"].nunique()
+    for col in spec["counts"]:
+        expected[col] = sums[col]
+    for metric in spec["metrics"]:
+        if metric.combine == "sum":
+            expected[metric.name] = sums[metric.name]
+        elif metric.combine == "max":
+            expected[metric.name] = grouped[metric.name].max()
+        else:
+            expected[metric.name] = np.round(metric.combine(sums), 2)
+    return expected
+
+
+@pytest.mark.parametrize("view", list(leaderboard_views))
+def test_windows_match_groupby(tables, view):
+    spec = leaderboard_views[view]
+    df = tables[spec["season"]]
+    form = SeasonForm(df, spec["metrics"], spec["components"], spec["counts"])
+    for first, last in windows:
+        window = form.window(first, last).set_index("PLAYER")
+        expected = groupby_window(df, spec, first, last)
+        assert sorted(window.index) == sorted(expected.index)
+        window = window.loc[expected.index]
+        assert (window["Team"].astype(str) == expected["Team"].astype(str)).all()
+        for col in expected.columns.drop("Team"):
+            np.testing.assert_allclose(
+                window[col].to_numpy(dtype="float64"),
+                expected[col].to_numpy(dtype="float64"),
+                err_msg="{} {}-{}".format(col, first, last),
+            )
+
+
+def test_leaderboard_order(tables):
+    spec = leaderboard_views["bowling"]
+    form = SeasonForm(
+        tables["bowling"], spec["metrics"], spec["components"], spec["counts"]
+    )
+    frame, rows = form.leaderboard(2016, 2019, "Econ", "Mumbai Indians")
+    econ = frame["Econ"].to_numpy()[rows]
+    assert len(rows) and (np.diff(econ) >= 0).all() and np.isfinite(econ).all()
+    assert (frame["Team"].to_numpy()[rows] == "Mumbai Indians").all()
+
+
+def test_cached_form_matches_built(tables, tmp_path):
+    spec = leaderboard_views["batting"]
+    args = (tables["batting"], spec["metrics"], spec["components"])
+    built = SeasonForm(*args)
+    path = str(tmp_path)
+    cached_form(*args, path)
+    # the second call maps the arrays written by the first
+    mapped = cached_form(*args, path)
+    assert isinstance(mapped._cumsum, np.memmap)
+    pd.testing.assert_frame_equal(mapped.window(2012, 2017), built.window(2012, 2017))
@@ -0,0 +1,138 @@
+import json
+
+import dash
+import dash_core_components as dcc
+import dash_html_components as html
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+from dash.dependencies import Input, Output
+from dash.exceptions import InvalidCallbackReturnValue, PreventUpdate
+
+import serialization
+from input_space import split_callback_id
+from serialization import records, serialize_callbacks
+
+df = pd.DataFrame(
+    {
+        "PLAYER": ["Virat Kohli", None, "MS Dhoni"],
+        "Runs": np.array([973, 442, 455], dtype="int16"),
+        "Avg": [81.08, np.nan, 41.36],
+        "Team": pd.Categorical(["RCB", "CSK", "CSK"]),
+    }
+)
+
+
+def build_app():
+    app = dash.Dash(__name__)
+    app.layout = html.Div(
+        [
+            dcc.Dropdown(id="metric", value="Runs"),
+            dcc.Graph(id="graph"),
+            html.Div(id="text"),
+            html.Div(id="table"),
+        ]
+    )
+
+    @app.callback(Output("graph", "figure"), [Input("metric", "value")])
+    def figure(metric):
+        fig = go.Figure(go.Bar(x=df[metric].to_numpy(), y=df["PLAYER"]))
+        fig.update_layout(title="Top {}".format(metric), height=550)
+        return fig
+
+    @app.callback(
+        [Output("text", "children"), Output("table", "children")],
+        [Input("metric", "value")],
+    )
+    def text_and_table(metric):
+        if metric == "Avg":
+            return dash.no_update, records(df)
+        return [html.B(metric), np.int64(len(df))], records(df, [2, 0])
+
+    @app.callback(Output("table", "title"), [Input("metric", "value")])
+    def nothing(metric):
+        return dash.no_update
+
+    return app
+
+
+def responses(app, metric):
+    """The response of every callback for metric, parsed, None when the
+    callback doesn't update anything."""
+    parsed = {}
+    for callback_id, callback in app.callback_map.items():
+        outputs = [
+            {"id": output.rsplit(".", 1)[0], "property": output.rsplit(".", 1)[1]}
+            for output in callback_id.strip(".").split("...")
+        ]
+        with app.server.test_request_context():
+            try:
+                response = callback["callback"](
+                    metric,
+                    outputs_list=(
+                        outputs if callback_id.startswith("..") else outputs[0]
+                    ),
+                )
+            except PreventUpdate:
+                response = None
+        parsed[callback_id] = None if response is None else json.loads(response)
+    return parsed
+
+
+@pytest.mark.parametrize("metric", ["Runs", "Avg"])
+def test_same_responses_as_dash(metric):
+    app = build_app()
+    expected = responses(app, metric)
+    serialize_callbacks(app)
+    assert responses(app, metric) == expected
+
+
+def test_other_releases_keep_dash_wrapper(monkeypatch):
+    app = build_app()
+    wrappers = {key: value["callback"] for key, value in app.callback_map.items()}
+    monkeypatch.setattr(serialization, "fast_paths", False)
+    serialize_callbacks(app)
+    assert {
+        key: value["callback"] for key, value in app.callback_map.items()
+    } == wrappers
+    assert responses(app, "Runs") == responses(build_app(), "Runs")
+
+
+def test_records():
+    assert records(df, [1]) == [
+        {"PLAYER": None, "Runs": 442, "Avg": None, "Team": "CSK"}
+    ]
+    assert records(df, [0], ["Avg"], decimals=1) == [{"Avg": 81.1}]
+
+
+def invalid_return_errors(app):
+    errors = {}
+    for callback_id, callback in app.callback_map.items():
+        outputs = split_callback_id(callback_id)
+        with app.server.test_request_context():
+            with pytest.raises(InvalidCallbackReturnValue) as error:
+                callback["callback"]("Runs", outputs_list=outputs)
+        errors[callback_id] = str(error.value)
+    return errors
+
+
+def test_invalid_return_values_fail_like_dash():
+    app = dash.Dash(__name__)
+    app.layout = html.Div([dcc.Dropdown(id="metric"), html.Div(id="text")])
+
+    @app.callback(Output("text", "children"), [Input("metric", "value")])
+    def single(metric):
+        return {metric}
+
+    @app.callback(
+        [Output("text", "title"), Output("text", "className")],
+        [Input("metric", "value")],
+    )
+    def multi(metric):
+        return metric, [{metric}]
+
+    expected = invalid_return_errors(app)
+    serialize_callbacks(app)
+    assert invalid_return_errors(app) == expected
+    assert "`<Output `text.children`>`" in expected["text.children"]
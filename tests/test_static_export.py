@@ -0,0 +1,19 @@
+import pytest
+
+from static_export import check_output, manifest_name
+
+
+def test_check_output_refuses_other_directories(tmp_path):
+    (tmp_path / "batting.csv").write_text("PLAYER\n")
+    with pytest.raises(ValueError):
+        check_output(str(tmp_path))
+    with pytest.raises(ValueError):
+        check_output(str(tmp_path / "batting.csv"))
+
+
+def test_check_output_accepts_exports(tmp_path):
+    check_output(str(tmp_path / "missing"))
+    check_output(str(tmp_path))
+    (tmp_path / manifest_name).write_text("{}")
+    (tmp_path / "points-table_data").mkdir()
+    check_output(str(tmp_path))
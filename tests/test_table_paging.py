@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from table_paging import filter_mask, page_records, parse_filter_query
+
+df = pd.DataFrame(
+    {
+        "PLAYER": ["Virat Kohli", "Suresh Raina", "Rohit Sharma", "MS Dhoni"],
+        "Team": ["RCB", "CSK", "MI", "CSK"],
+        "Runs": [973, 442, 489, 455],
+        "Avg": [81.08, 40.18, 37.61, 41.36],
+    }
+)
+rows = np.arange(len(df))
+
+
+def matching(filter_query):
+    return list(df["PLAYER"][filter_mask(df, rows, filter_query)])
+
+
+def test_and():
+    assert matching("{Runs} > 450 && {Team} = CSK") == ["MS Dhoni"]
+
+
+def test_or():
+    assert matching("{Runs} > 900 || {Team} = MI") == ["Virat Kohli", "Rohit Sharma"]
+    assert matching("{Team} = MI||{Team} = RCB") == ["Virat Kohli", "Rohit Sharma"]
+
+
+def test_and_binds_tighter_than_or():
+    assert matching("{Team} = MI || {Team} = CSK && {Runs} > 450") == [
+        "Rohit Sharma",
+        "MS Dhoni",
+    ]
+    assert matching("({Team} = MI || {Team} = CSK) && {Runs} > 450") == [
+        "Rohit Sharma",
+        "MS Dhoni",
+    ]
+    assert matching("({Team} = MI || {Team} = CSK) && {Runs} < 450") == ["Suresh Raina"]
+
+
+def test_operators_inside_quotes():
+    assert parse_filter_query('{PLAYER} contains "a || b"') == [
+        [("PLAYER", "contains", "a || b", True)]
+    ]
+    assert matching('{PLAYER} contains "&&"') == []
+
+
+def test_quoted_numbers_compare_as_numbers():
+    assert matching('{Runs} > "500"') == ["Virat Kohli"]
+    assert matching("{Avg} >= '41.36'") == ["Virat Kohli", "MS Dhoni"]
+    # as a string "973" > "500" but "442" < "500" either way, check the order
+    assert matching('{Runs} < "1000"') == list(df["PLAYER"])
+
+
+def test_non_numeric_strings_never_compare_with_numbers():
+    assert matching('{Runs} > "many"') == []
+    assert matching('{Runs} != "many"') == list(df["PLAYER"])
+
+
+def test_case_insensitive_and_unknown_parts():
+    assert matching("{Team} ieq csk") == ["Suresh Raina", "MS Dhoni"]
+    # comparisons that aren't evaluated, and unknown columns, match
+    assert matching("{Runs} is blank && {Team} = MI") == ["Rohit Sharma"]
+    assert matching("{Wkts} > 10") == list(df["PLAYER"])
+
+
+@pytest.mark.parametrize(
+    "filter_query",
+    ["({Runs} > 500", "{Runs} > 500)", "{Runs} > 500 ||", '{Team} = "MI'],
+)
+def test_malformed_queries(filter_query):
+    with pytest.raises(ValueError):
+        parse_filter_query(filter_query)
+    # filter nothing, like the browser
+    assert matching(filter_query) == list(df["PLAYER"])
+
+
+def test_page_records_filters_sorts_and_pages():
+    page, page_count = page_records(
+        df, rows, 0, 2, [{"column_id": "Runs", "direction": "asc"}], "{Runs} > 450"
+    )
+    assert page_count == 2
+    assert [record["PLAYER"] for record in page] == ["MS Dhoni", "Rohit Sharma"]
@@ -1,12 +1,12 @@
 # import libraries
 import requests
-import numpy as np
 import pandas as pd
 from bs4 import BeautifulSoup as bs
 import time
 import random
 import re
 import os
+import sys
 
 
 # Important Note ---
@@ -18,6 +18,11 @@ year_list = [year for year in range(2019, 2007, -1)]
 project_root_dir = os.path.normpath(os.getcwd() + os.sep + os.pardir)
 file_path = os.path.join(project_root_dir, "data")
 os.makedirs(file_path, exist_ok=True)
+aggregates_path = os.path.join(file_path, "aggregates", "batting")
+
+# the season aggregates live next to the app
+sys.path.insert(0, project_root_dir)
+from season_aggregates import batting_record  # noqa: E402
 
 # function for loading data
 def load_data(filename, file_path=file_path):
@@ -625,35 +630,16 @@ def get_wins_losses_data():
     return win_losses_df
 
 
-def batting_all_time_record(df):
+def batting_all_time_record(df, aggregates_path=aggregates_path):
     """This Function create the aggregated all the season data
     into a single dataframe.
-    """
-    agg_dict = {
-        "Mat": "sum",
-        "Inns": "sum",
-        "NO": "sum",
-        "Runs": "sum",
-        "HS": "max",
-        "Avg": "mean",
-        "BF": "sum",
-        "SR": "mean",
-        "100": "sum",
-        "50": "sum",
-        "4s": "sum",
-        "6s": "sum",
-    }
-    batting_all_time = (
-        batting.groupby("PLAYER")
-        .aggregate(agg_dict)
-        .reset_index()
-        .sort_values(by="Runs", ascending=False)
-    )
-    batting_all_time = batting_all_time.round(2)
-
-    batting_all_time.index = np.arange(0, len(batting_all_time))
 
-    return batting_all_time
+    Avg and SR are the career runs over the career dismissals and balls, not
+    the mean of the season values. The per season aggregates are kept in
+    aggregates_path, only the seasons that are new or changed since the last
+    run get aggregated again.
+    """
+    return batting_record(df, aggregates_path)
 
 
 def get_bowling_data_all_time():